@@ -5,7 +5,8 @@ Backtest Orchestrator
 
 Manages backtest execution for the trading engine:
 1. Downloads Kraken trade data via kraken_day_capture.py
-2. Caches data in backtest/data/SYMBOL/YYYY-MM-DD.jsonl.gz
+2. Caches data in backtest/data/SYMBOL/YYYY-MM-DD.parquet
+   (JSONL.GZ fallback when pyarrow is unavailable)
 3. Runs backtest via KrakenFileReplayAdapter
 4. Generates per-day and summary reports
 
@@ -18,23 +19,36 @@ import argparse
 import json
 import os
 import sys
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
-import subprocess
 import gzip
 
+try:
+    import orjson  # faster report serialization; optional
+except Exception:
+    orjson = None
+
+# Kraken's public tier tolerates roughly 1 req/sec per IP; each download worker
+# spaces its requests so the *global* rate stays at this baseline.
+BASE_RATE_DELAY = 1.1
+
 # Add scripts/ to path for kraken_day_capture import
 REPO_ROOT = Path(__file__).parent.parent
 SCRIPTS_DIR = REPO_ROOT / "scripts"
 sys.path.insert(0, str(SCRIPTS_DIR))
 
+import kraken_day_capture as kdc
+
 
 class BacktestOrchestrator:
     """Manages backtest data, execution, and reporting."""
 
-    def __init__(self, repo_root: Path = REPO_ROOT):
+    def __init__(self, repo_root: Path = REPO_ROOT, parallel_downloads: int = 4):
         self.repo_root = repo_root
+        self.parallel_downloads = max(1, parallel_downloads)
         self.data_dir = self.repo_root / "backtest" / "data"
         self.reports_dir = self.repo_root / "backtest" / "reports"
         self.scripts_dir = self.repo_root / "scripts"
@@ -44,87 +58,195 @@ class BacktestOrchestrator:
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.reports_dir.mkdir(parents=True, exist_ok=True)
         
-        # Index file tracking downloaded dates
+        # Index tracking downloaded dates: an append-only line log that is
+        # O(1) to update per day; the in-memory dict stays authoritative.
+        # (.index.json is the legacy blob format, migrated on first load.)
         self.index_file = self.data_dir / ".index.json"
+        self.index_log = self.data_dir / ".index.jsonl"
+        self._index_lock = threading.Lock()
         self._load_index()
 
+        # One pooled HTTP session for all downloads: avoids per-day interpreter
+        # startup and re-handshaking TLS, and lets concurrent workers share
+        # keep-alive connections to api.kraken.com. Pool sizing goes through
+        # make_session so the retry/backoff adapter stays mounted.
+        self._session = kdc.make_session(pool_connections=8, pool_maxsize=16)
+        self._pair_cache: Dict[str, str] = {}
+        self._pair_lock = threading.Lock()
+
+    # Compact the index log once it accumulates this many lines
+    INDEX_COMPACT_LINES = 10000
+
     def _load_index(self) -> None:
-        """Load cache index from disk."""
+        """Load cache index: seed from the legacy blob, then replay the log."""
+        self.index = {}
         if self.index_file.exists():
             with open(self.index_file) as f:
                 self.index = json.load(f)
-        else:
-            self.index = {}
 
-    def _save_index(self) -> None:
-        """Save cache index to disk."""
-        with open(self.index_file, 'w') as f:
-            json.dump(self.index, f, indent=2)
+        log_lines = 0
+        if self.index_log.exists():
+            with open(self.index_log) as f:
+                for line in f:
+                    log_lines += 1
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    symbol, date_str = rec.get("symbol"), rec.get("date")
+                    if not symbol or not date_str:
+                        continue
+                    dates = self.index.setdefault(
+                        symbol, {"downloaded_dates": []}
+                    )["downloaded_dates"]
+                    if date_str not in dates:
+                        dates.append(date_str)
+
+        for entry in self.index.values():
+            entry["downloaded_dates"].sort()
+
+        if log_lines > self.INDEX_COMPACT_LINES or self.index_file.exists():
+            self._compact_index()
+
+    def _compact_index(self) -> None:
+        """Rewrite the log as one deduplicated line per symbol/date."""
+        tmp = self.index_log.with_suffix(".jsonl.tmp")
+        with open(tmp, 'w') as f:
+            for symbol in sorted(self.index):
+                for date_str in self.index[symbol]["downloaded_dates"]:
+                    f.write(json.dumps(
+                        {"symbol": symbol, "date": date_str},
+                        separators=(",", ":")
+                    ) + "\n")
+        os.replace(tmp, self.index_log)
+        if self.index_file.exists():
+            self.index_file.unlink()  # legacy blob now migrated
+
+    def _record_downloaded(self, symbol: str, date_str: str) -> None:
+        """Append one record to the index log (single locked O_APPEND write)."""
+        rec = json.dumps({"symbol": symbol, "date": date_str},
+                         separators=(",", ":")) + "\n"
+        fd = os.open(self.index_log, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            try:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except ImportError:
+                pass  # non-POSIX: O_APPEND alone is good enough here
+            os.write(fd, rec.encode())
+        finally:
+            os.close(fd)
 
     def _get_symbol_dir(self, symbol: str) -> Path:
         """Get directory for symbol's cached data."""
         return self.data_dir / symbol
 
-    def _download_day(self, symbol: str, date: datetime, force: bool = False) -> bool:
+    def _data_file(self, symbol: str, date_str: str) -> Path:
         """
-        Download one day of Kraken trades using kraken_day_capture.py.
-        
+        Path of the cached data file for a day, preferring Parquet over
+        JSONL.GZ when both exist.
+        """
+        symbol_dir = self._get_symbol_dir(symbol)
+        parquet_file = symbol_dir / f"{date_str}.parquet"
+        if parquet_file.exists():
+            return parquet_file
+        return symbol_dir / f"{date_str}.jsonl.gz"
+
+    def _resolve_pair(self, symbol: str) -> str:
+        """
+        Resolve symbol to a Kraken altname. Memoized in memory across days
+        and on disk (24h TTL) across runs, so repeated backtests skip the
+        AssetPairs catalog fetch entirely.
+        """
+        with self._pair_lock:
+            if symbol not in self._pair_cache:
+                cache_path = self.data_dir / ".kraken_assetpairs.json"
+                self._pair_cache[symbol] = kdc.resolve_pair(
+                    self._session, symbol, cache_path=str(cache_path)
+                )
+            return self._pair_cache[symbol]
+
+    def _download_day(
+        self,
+        symbol: str,
+        date: datetime,
+        force: bool = False,
+        rate_delay: float = BASE_RATE_DELAY
+    ) -> bool:
+        """
+        Download one day of Kraken trades via the kraken_day_capture module.
+
+        Runs in-process (no subprocess), reusing the orchestrator's pooled
+        HTTP session and memoized pair resolution across days.
+
+        Args:
+            rate_delay: Per-request pacing passed through to the capture
+                module. Scaled up when several days download concurrently
+                so the aggregate request rate stays under Kraken's limit.
+
         Returns:
             True if download succeeded, False otherwise.
         """
         symbol_dir = self._get_symbol_dir(symbol)
         symbol_dir.mkdir(parents=True, exist_ok=True)
-        
-        output_file = symbol_dir / f"{date.strftime('%Y-%m-%d')}.jsonl.gz"
-        
-        # Check if already cached
-        if output_file.exists() and not force:
-            print(f"  [cached] {symbol} {date.strftime('%Y-%m-%d')}")
+
+        date_str = date.strftime("%Y-%m-%d")
+        cached_file = self._data_file(symbol, date_str)
+
+        # Check if already cached (either format)
+        if cached_file.exists() and not force:
+            print(f"  [cached] {symbol} {date_str}")
             return True
-        
-        print(f"  [downloading] {symbol} {date.strftime('%Y-%m-%d')}")
-        
+
+        # New downloads go to Parquet/zstd when pyarrow is available:
+        # smaller on disk and far faster to reload than JSONL.GZ.
+        ext = "parquet" if kdc.pa is not None else "jsonl.gz"
+        output_file = symbol_dir / f"{date_str}.{ext}"
+
+        print(f"  [downloading] {symbol} {date_str}")
+
         try:
-            # Run kraken_day_capture.py
-            capture_script = self.scripts_dir / "kraken_day_capture.py"
-            if not capture_script.exists():
-                print(f"    ERROR: {capture_script} not found")
-                return False
-            
-            # Call the capture script (assumes it can be imported as module)
-            # For now, we'll use subprocess to be safer
-            cmd = [
-                sys.executable,
-                str(capture_script),
-                "--symbol", symbol,
-                "--date", date.strftime("%Y-%m-%d"),
-                "--output", str(output_file),
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-            
-            if result.returncode != 0:
-                print(f"    ERROR: {result.stderr}")
-                return False
-            
+            pair_alt = self._resolve_pair(symbol)
+
+            # Day bounds in UTC seconds
+            day_start = date.replace(tzinfo=timezone.utc).timestamp()
+            day_end = day_start + 86400.0
+
+            if output_file.suffix == ".parquet":
+                # Streaming columnar capture: pages land in numpy arrays and
+                # flush to Parquet row groups as they arrive
+                count = kdc.capture_day_parquet(
+                    self._session, pair_alt, day_start, day_end,
+                    str(output_file), rate_delay=rate_delay, verbose=False
+                )
+            else:
+                trade_stream = kdc.fetch_trades_for_day(
+                    self._session, pair_alt, day_start, day_end,
+                    rate_delay=rate_delay, verbose=False
+                )
+                count = kdc.write_day(trade_stream, str(output_file))
+
             # Verify file was created
             if not output_file.exists():
                 print(f"    ERROR: Output file not created: {output_file}")
                 return False
-            
-            # Verify it's valid gzip
-            try:
-                with gzip.open(output_file, 'rb') as f:
-                    _ = f.read(100)  # Try reading first 100 bytes
-            except Exception as e:
-                print(f"    ERROR: Invalid gzip file: {e}")
-                return False
-            
+
+            # Verify it's valid gzip (Parquet validity is checked by pyarrow
+            # at write time)
+            if output_file.suffix == ".gz":
+                try:
+                    with gzip.open(output_file, 'rb') as f:
+                        _ = f.read(100)  # Try reading first 100 bytes
+                except Exception as e:
+                    print(f"    ERROR: Invalid gzip file: {e}")
+                    return False
+
+            print(f"    {count} trades")
             return True
-        
-        except subprocess.TimeoutExpired:
-            print(f"    ERROR: Download timeout")
-            return False
+
         except Exception as e:
             print(f"    ERROR: {e}")
             return False
@@ -149,38 +271,52 @@ class BacktestOrchestrator:
             Tuple of (success_count, fail_count)
         """
         if dates is None:
-            # Download last N days
-            today = datetime.now().date()
+            # Download last N days (one midnight anchor, offset arithmetic)
+            midnight = datetime.combine(datetime.now().date(), datetime.min.time())
             dates = [
-                datetime.combine(today - timedelta(days=i), datetime.min.time())
+                midnight - timedelta(days=i)
                 for i in range(num_days - 1, -1, -1)
             ]
         
-        print(f"Downloading {symbol}: {len(dates)} days")
-        
+        workers = min(self.parallel_downloads, len(dates))
+        print(f"Downloading {symbol}: {len(dates)} days ({workers} parallel)")
+
         success = 0
         failed = 0
-        
-        for date in dates:
-            if self._download_day(symbol, date, force=force):
-                success += 1
-            else:
-                failed += 1
-        
+
+        # Each day has an independent 'since' cursor and output file, so days
+        # download concurrently. The per-request delay is scaled by the worker
+        # count to keep the aggregate request rate at the serial baseline.
+        rate_delay = BASE_RATE_DELAY * workers
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    self._download_day, symbol, date,
+                    force=force, rate_delay=rate_delay
+                ): date
+                for date in dates
+            }
+            for future in as_completed(futures):
+                if future.result():
+                    success += 1
+                else:
+                    failed += 1
+
         print(f"Download complete: {success} succeeded, {failed} failed")
-        
-        # Update index
-        if symbol not in self.index:
-            self.index[symbol] = {"downloaded_dates": []}
-        
-        for date in dates:
-            date_str = date.strftime("%Y-%m-%d")
-            if date_str not in self.index[symbol]["downloaded_dates"]:
-                self.index[symbol]["downloaded_dates"].append(date_str)
-        
-        self.index[symbol]["downloaded_dates"].sort()
-        self._save_index()
-        
+
+        # Update index: one appended line per newly-seen date
+        date_strs = [date.strftime("%Y-%m-%d") for date in dates]
+        with self._index_lock:
+            if symbol not in self.index:
+                self.index[symbol] = {"downloaded_dates": []}
+
+            for date_str in date_strs:
+                if date_str not in self.index[symbol]["downloaded_dates"]:
+                    self.index[symbol]["downloaded_dates"].append(date_str)
+                    self._record_downloaded(symbol, date_str)
+
+            self.index[symbol]["downloaded_dates"].sort()
+
         return success, failed
 
     def run_backtest(
@@ -212,15 +348,16 @@ class BacktestOrchestrator:
                 print(f"ERROR: No cached data for {symbol}")
                 return []
             
-            # Find all .jsonl.gz files in symbol directory
-            jsonl_files = sorted(symbol_dir.glob("*.jsonl.gz"))
-            if not jsonl_files:
-                print(f"ERROR: No JSONL.GZ files in {symbol_dir}")
+            # Find all cached day files (either format, deduped by date)
+            data_files = list(symbol_dir.glob("*.parquet")) + list(symbol_dir.glob("*.jsonl.gz"))
+            date_strs = sorted({f.name.split(".")[0] for f in data_files})
+            if not date_strs:
+                print(f"ERROR: No data files in {symbol_dir}")
                 return []
-            
+
             dates = [
-                datetime.strptime(f.stem, "%Y-%m-%d")
-                for f in jsonl_files
+                datetime.strptime(d, "%Y-%m-%d")
+                for d in date_strs
             ]
         
         print(f"Running backtest for {symbol}: {len(dates)} days, strategy={strategy}")
@@ -229,8 +366,8 @@ class BacktestOrchestrator:
         
         for date in dates:
             date_str = date.strftime("%Y-%m-%d")
-            data_file = self._get_symbol_dir(symbol) / f"{date_str}.jsonl.gz"
-            
+            data_file = self._data_file(symbol, date_str)
+
             if not data_file.exists():
                 print(f"  [skip] {date_str} - data file not found")
                 continue
@@ -276,10 +413,14 @@ class BacktestOrchestrator:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_file = self.reports_dir / f"{symbol}_{timestamp}.json"
         
-        # Aggregate results
-        total_pnl = sum(r.get("pnl", 0.0) for r in results)
-        total_trades = sum(len(r.get("trades", [])) for r in results)
-        max_dd = min((r.get("max_drawdown", 0.0) for r in results), default=0.0)
+        # Aggregate results in one pass over the dicts
+        total_pnl = 0.0
+        total_trades = 0
+        max_dd = 0.0
+        for r in results:
+            total_pnl += r.get("pnl", 0.0)
+            total_trades += len(r.get("trades", []))
+            max_dd = min(max_dd, r.get("max_drawdown", 0.0))
         
         report = {
             "symbol": symbol,
@@ -294,10 +435,16 @@ class BacktestOrchestrator:
             "daily_results": results,
         }
         
-        # Write report
+        # Write report (orjson's indented path is 5-10x stdlib once daily
+        # trades lists populate; SERIALIZE_NUMPY spares float() casts upstream)
         output_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        if orjson is not None:
+            output_file.write_bytes(orjson.dumps(
+                report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
+        else:
+            with open(output_file, 'w') as f:
+                json.dump(report, f, indent=2)
         
         print(f"Report generated: {output_file}")
         
@@ -312,22 +459,23 @@ def main():
     parser.add_argument("--end", type=str, help="End date (YYYY-MM-DD)")
     parser.add_argument("--strategy", default="MovingAverage", help="Strategy name")
     parser.add_argument("--force", action="store_true", help="Re-download cached data")
+    parser.add_argument("--parallel", type=int, default=4,
+                        help="Concurrent day downloads (rate-limited globally)")
     parser.add_argument("--output", type=str, help="Output report file")
     
     args = parser.parse_args()
     
-    orch = BacktestOrchestrator()
+    orch = BacktestOrchestrator(parallel_downloads=args.parallel)
     
     # Determine dates
     dates = None
     if args.start and args.end:
         start = datetime.strptime(args.start, "%Y-%m-%d")
         end = datetime.strptime(args.end, "%Y-%m-%d")
-        dates = []
-        current = start
-        while current <= end:
-            dates.append(current)
-            current += timedelta(days=1)
+        dates = [
+            start + timedelta(days=i)
+            for i in range((end - start).days + 1)
+        ]
     
     # Download data
     print(f"\n=== Downloading Kraken Data ===")
@@ -15,28 +15,93 @@ Notes:
 
 import argparse
 import gzip
+import io
 import json
 import math
+import os
 import sys
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Iterable, List, Optional, Tuple
 from zoneinfo import ZoneInfo  # ← NEW (stdlib in Python 3.9+)
 
 import requests
 
+try:
+    import orjson  # ~2-4x faster than stdlib json; optional
+except Exception:
+    orjson = None
+
+try:
+    from isal import igzip  # ISA-L DEFLATE: 3-6x faster than stdlib gzip
+except Exception:
+    igzip = None
+
+# gzip-compatible module used for JSONL.GZ I/O (prefers ISA-L when installed)
+gz = igzip if igzip is not None else gzip
+
+try:
+    import rapidgzip  # multi-core gzip decoder; optional
+except Exception:
+    rapidgzip = None
+
+try:
+    import zstandard as zstd  # .jsonl.zst output/input; optional
+except Exception:
+    zstd = None
+
+# Days smaller than this decompress fast enough single-threaded that the
+# parallel decoder's startup cost isn't worth paying.
+PARALLEL_GUNZIP_MIN_BYTES = 8 << 20
+
+# Decompressed-side read buffer: line iteration pulls from this instead of
+# making many small reads against the codec.
+READ_BUFFER_BYTES = 1 << 20
+
+# Knee of the speed/ratio curve for JSON tick data: far faster than the
+# default level at a small size penalty. Valid for both isal (0-3) and stdlib.
+GZIP_LEVEL = 3
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+try:
+    import numba  # JIT-compiled bar kernel; optional
+except Exception:
+    numba = None
+
 try:
     import pandas as pd
 except Exception:
     pd = None
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.json as pa_json
+    import pyarrow.compute as pa_compute
+except Exception:
+    pa = None
+    pq = None
+    pa_json = None
+    pa_compute = None
+
 import asyncio
 try:
     import websockets
 except Exception:
     websockets = None
 
+try:
+    import msgpack  # optional binary wire format for --ws replay
+except Exception:
+    msgpack = None
+
 
 
 
@@ -44,12 +109,47 @@ except Exception:
 
 KRAKEN_API = "https://api.kraken.com/0/public"
 
+
+def make_session(pool_connections: int = 8,
+                 pool_maxsize: int = 8) -> requests.Session:
+    """
+    Build a requests.Session with pooled keep-alive connections to Kraken,
+    so multi-page (and multi-day, when driven by the orchestrator) captures
+    reuse one TCP/TLS connection instead of re-handshaking. Transient 429s
+    and 5xxs retry with backoff instead of killing a half-finished day, and
+    responses come back compressed. Callers with concurrent workers (the
+    orchestrator) size the pool here rather than re-mounting an adapter,
+    which would silently drop the retry policy.
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    retry = Retry(total=5, backoff_factor=0.5,
+                  status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET"])
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=pool_connections,
+                                    pool_maxsize=pool_maxsize,
+                                    max_retries=retry))
+    s.headers["Accept-Encoding"] = "gzip, br"
+    return s
+
+
 # ---- Helpers ----------------------------------------------------------------
 
 
 
 
 
+# Compiled once at import; the unit table replaces the if/elif ladder.
+_DURATION_RE = re.compile(r"(\d+)\s*([a-z]+)")
+_DURATION_UNITS = {
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+}
+
+
 def parse_duration_to_seconds(expr: str) -> int:
     """
     Parse strings like '24h', '6h30m', '90m', '3600s', '1d2h15m10s' (case-insensitive).
@@ -59,21 +159,14 @@ def parse_duration_to_seconds(expr: str) -> int:
         raise ValueError("empty duration")
     s = expr.strip().lower()
     # Allow plain integer = seconds
-    if re.fullmatch(r"\d+", s):
+    if s.isdigit():
         return int(s)
     total = 0
-    for num, unit in re.findall(r"(\d+)\s*([a-z]+)", s):
-        n = int(num)
-        if unit in ("s", "sec", "secs", "second", "seconds"):
-            total += n
-        elif unit in ("m", "min", "mins", "minute", "minutes"):
-            total += n * 60
-        elif unit in ("h", "hr", "hrs", "hour", "hours"):
-            total += n * 3600
-        elif unit in ("d", "day", "days"):
-            total += n * 86400
-        else:
+    for num, unit in _DURATION_RE.findall(s):
+        mult = _DURATION_UNITS.get(unit)
+        if mult is None:
             raise ValueError(f"unknown unit '{unit}' in duration '{expr}'")
+        total += int(num) * mult
     if total <= 0:
         raise ValueError(f"non-positive duration '{expr}'")
     return total
@@ -101,246 +194,1112 @@ def tz_day_bounds(day_str: str, tz_name: str) -> Tuple[float, float]:
     end_utc = end_local.astimezone(timezone.utc)
     return start_utc.timestamp(), end_utc.timestamp()
 
-def resolve_pair(session: requests.Session, pair_like: str) -> str:
+# AssetPairs catalog changes at most daily; cache files younger than this
+# are used without a network round trip.
+ASSETPAIRS_CACHE_TTL = 86400
+
+# Default on-disk location for the memoized catalog (used by the CLI;
+# the orchestrator keeps its own copy next to its data directory).
+ASSETPAIRS_CACHE_PATH = os.path.expanduser("~/.cache/kraken_assetpairs.json")
+
+
+def fetch_assetpairs(session: requests.Session, cache_path: Optional[str] = None) -> Dict:
     """
-    Resolve a user-provided pair like 'XBTUSD' or 'BTC/USD' to a Kraken altname.
-    Kraken's AssetPairs returns keys (internal) and fields including 'altname' and 'wsname'.
-    We return the altname, which is accepted by public endpoints.
+    Fetch Kraken's AssetPairs catalog, optionally memoized on disk.
+    A fresh cache file (see ASSETPAIRS_CACHE_TTL) skips the round trip
+    entirely; a stale or unreadable one is refreshed in place.
     """
+    if cache_path and os.path.exists(cache_path):
+        if time.time() - os.path.getmtime(cache_path) < ASSETPAIRS_CACHE_TTL:
+            try:
+                with open(cache_path) as f:
+                    return json.load(f)
+            except Exception:
+                pass  # corrupt cache; fall through to refetch
+
     resp = session.get(f"{KRAKEN_API}/AssetPairs", timeout=30)
     resp.raise_for_status()
-    data = resp.json()["result"]
+    body = orjson.loads(resp.content) if orjson is not None else resp.json()
+    data = body["result"]
+
+    if cache_path:
+        try:
+            os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+            tmp = cache_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, cache_path)
+        except Exception:
+            pass  # cache write is best-effort
+    return data
+
+
+try:
+    from kraken_pair_table import KRAKEN_PAIR_ALIASES
+except Exception:
+    KRAKEN_PAIR_ALIASES = {}
+
 
+def resolve_pair(session: requests.Session, pair_like: str,
+                 cache_path: Optional[str] = None, refresh: bool = False) -> str:
+    """
+    Resolve a user-provided pair like 'XBTUSD' or 'BTC/USD' to a Kraken altname.
+    Kraken's AssetPairs returns keys (internal) and fields including 'altname' and 'wsname'.
+    We return the altname, which is accepted by public endpoints.
+
+    Known symbols resolve O(1) from the vendored static table with no
+    network call; pass refresh=True (--refresh-pairs) to force the
+    catalog walk.
+    """
     target = pair_like.replace("/", "").upper()
-    # First pass: exact altname match
-    for _, meta in data.items():
+
+    if not refresh:
+        hit = KRAKEN_PAIR_ALIASES.get(target)
+        if hit:
+            return hit
+
+    data = fetch_assetpairs(session, cache_path=cache_path)
+    # One pass builds both lookup maps, then two O(1) probes: exact altname
+    # first, then wsname with the slash stripped.
+    by_alt, by_ws = {}, {}
+    for meta in data.values():
         alt = meta.get("altname", "")
-        if alt.upper() == target:
-            return alt
-    # Second pass: strip slash from wsname
-    for _, meta in data.items():
+        by_alt[alt.upper()] = alt
         ws = (meta.get("wsname") or "").replace("/", "")
-        alt = meta.get("altname", "")
-        if ws.upper() == target:
-            return alt
-    # Third pass: accept input if it seems valid (Kraken often accepts 'XBTUSD')
+        if ws:
+            by_ws[ws.upper()] = alt
+    hit = by_alt.get(target) or by_ws.get(target)
+    if hit:
+        return hit
+    # Fallback: accept input if it seems valid (Kraken often accepts 'XBTUSD')
     return pair_like
 
-def fetch_trades_for_day(session: requests.Session, pair_alt: str,
-                         day_start: float, day_end: float,
-                         rate_delay: float = 1.1, verbose=True) -> Iterable[Dict]:
+# Code tables for the compact side/ordertype encodings used by the SoA path.
+SIDE_CODES = ("b", "s")
+ORDERTYPE_CODES = ("m", "l")
+
+
+def _iso_utc(ns: int) -> str:
+    """ISO-8601 UTC string for a nanosecond timestamp (page-log helper)."""
+    return datetime.fromtimestamp(ns / 1_000_000_000, tz=timezone.utc).isoformat()
+
+
+def _iter_trade_pages(session: requests.Session, pair_alt: str,
+                      day_start: float, day_end: float,
+                      rate_delay: float = 1.1, verbose=True) -> Iterable[List]:
     """
-    Iterate all trades for [day_start, day_end) UNIX seconds.
-    Uses Kraken pagination via 'since' cursor. Filters to requested window.
-    Yields dicts with typed fields for convenience.
+    Yield raw Kraken /Trades pages (lists of rows) covering [day_start, day_end).
+    Handles the 'since' cursor advance; callers filter rows to the window.
     """
-
     start_ns = int(day_start * 1_000_000_000)
     end_ns   = int(day_end   * 1_000_000_000)
 
     since = start_ns  # <-- start exactly at the day's beginning (ns)
     max_pages = 200000  # safety
     pages = 0
-    last_progress = None
 
-    while pages < max_pages and since < end_ns:
-        pages += 1
-        params = {"pair": pair_alt, "since": since}  # <-- ALWAYS send 'since'
+    last_req = 0.0  # monotonic time of the previous request start
+
+    def get_page(since_val: int, delay: float) -> Dict:
+        # Rate-limit against the previous request's start rather than
+        # sleeping the full delay: time the caller spent parsing and
+        # compressing the last page counts toward the gap.
+        nonlocal last_req
+        if delay > 0:
+            wait = last_req + delay - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        last_req = time.monotonic()
+        params = {"pair": pair_alt, "since": since_val}  # <-- ALWAYS send 'since'
         r = session.get(f"{KRAKEN_API}/Trades", params=params, timeout=60)
         r.raise_for_status()
-        j = r.json()
+        # Busy pairs return multi-MB pages; orjson decodes them ~2x faster
+        # than the stdlib decoder behind r.json()
+        j = orjson.loads(r.content) if orjson is not None else r.json()
         if j.get("error"):
             raise RuntimeError(f"Kraken error: {j['error']}")
-
-        result = j.get("result", {})
-        last = result.get("last")
-        # pick the first list value that isn't 'last'
-        trades_raw = None
-        for k, v in result.items():
-            if k != "last" and isinstance(v, list):
-                trades_raw = v
+        return j
+
+    # Single prefetch worker: the next page's request (and its rate-delay
+    # sleep) runs while the caller parses/compresses the current page, so
+    # per-page CPU overlaps the network wait instead of adding to it.
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        future = ex.submit(get_page, since, 0.0)
+        while pages < max_pages and since < end_ns:
+            pages += 1
+            j = future.result()
+
+            result = j.get("result", {})
+            last = result.get("last")
+            # pick the first list value that isn't 'last'
+            trades_raw = None
+            for k, v in result.items():
+                if k != "last" and isinstance(v, list):
+                    trades_raw = v
+                    break
+            trades_raw = trades_raw or []
+
+            last_trade_ts = float(trades_raw[-1][2]) if trades_raw else None
+
+            # Advance the cursor (decided before yielding so the prefetch
+            # can start immediately)
+            stop = False
+            next_since = since
+            if last is None:
+                # No cursor? If we made no progress, bail.
+                if last_trade_ts is None:
+                    stop = True
+            else:
+                new_since = int(last)
+                if new_since <= since:
+                    # No forward progress; if we've already passed the end or got nothing, stop.
+                    if last_trade_ts is None or last_trade_ts >= day_end:
+                        stop = True
+                next_since = new_since
+
+            will_continue = (not stop) and pages < max_pages and next_since < end_ns
+            if will_continue:
+                future = ex.submit(get_page, next_since, rate_delay)
+
+            if verbose:
+                # The human-readable timestamp is a courtesy; format it on
+                # every 20th page instead of converting ns->datetime->ISO
+                # for thousands of lines nobody reads individually.
+                extra = f" ({_iso_utc(next_since)})" if pages % 20 == 1 else ""
+                print(f"[i] page={pages} since={next_since}{extra} rows={len(trades_raw)}", file=sys.stderr)
+
+            yield trades_raw
+
+            if stop:
                 break
-        trades_raw = trades_raw or []
-
-        emitted = 0
-        last_trade_ts = None
-        for row in trades_raw:
-            # [price, volume, time, side, ordertype, misc, (optional trade_id)]
-            ts = float(row[2])
-            last_trade_ts = ts
-            if ts < day_start:
-                continue
-            if ts >= day_end:
-                # we've hit/overshot the end of the window, but keep looping once more
-                # so that 'since' advances and we can exit cleanly
-                continue
+            since = next_since
+
+    if verbose:
+        print(f"[i] done after {pages} pages (since >= end_ns? {since >= end_ns})", file=sys.stderr)
+
+
+def fetch_trades_for_day(session: requests.Session, pair_alt: str,
+                         day_start: float, day_end: float,
+                         rate_delay: float = 1.1, verbose=True) -> Iterable[Dict]:
+    """
+    Iterate all trades for [day_start, day_end) UNIX seconds.
+    Uses Kraken pagination via 'since' cursor. Filters to requested window.
+    Yields dicts with typed fields for convenience.
+
+    With numpy installed, the string->float casts run page-at-a-time in C
+    (via _page_to_arrays + bulk .tolist()) instead of three Python-level
+    float() calls per trade.
+    """
+    pages = _iter_trade_pages(session, pair_alt, day_start, day_end,
+                              rate_delay=rate_delay, verbose=verbose)
+    if np is None:
+        for trades_raw in pages:
+            for row in trades_raw:
+                # [price, volume, time, side, ordertype, misc, (optional trade_id)]
+                ts = float(row[2])
+                if ts < day_start or ts >= day_end:
+                    continue
+                yield {
+                    "pair": pair_alt,
+                    "price": float(row[0]),
+                    "volume": float(row[1]),
+                    "time": ts,
+                    # side/ordertype/misc draw from tiny vocabularies; intern
+                    # so every repeat shares one str object
+                    "side": sys.intern(row[3]),
+                    "ordertype": sys.intern(row[4]),
+                    "misc": sys.intern(row[5]) if len(row) > 5 else "",
+                }
+        return
 
+    for trades_raw in pages:
+        page = _page_to_arrays(trades_raw, day_start, day_end)
+        if page is None:
+            continue
+        times, prices, vols, sides, otypes, misc = page
+        for price, vol, ts, side, otype, m in zip(
+                prices.tolist(), vols.tolist(), times.tolist(),
+                sides.tolist(), otypes.tolist(), misc):
             yield {
                 "pair": pair_alt,
-                "price": float(row[0]),
-                "volume": float(row[1]),
+                "price": price,
+                "volume": vol,
                 "time": ts,
-                "side": row[3],
-                "ordertype": row[4],
-                "misc": row[5] if len(row) > 5 else "",
+                "side": SIDE_CODES[side],
+                "ordertype": ORDERTYPE_CODES[otype],
+                "misc": m,
             }
-            emitted += 1
 
-        # Advance the cursor
-        if last is None:
-            # No cursor? If we made no progress, bail.
-            if last_trade_ts is None:
-                break
-        else:
-            new_since = int(last)
-            if new_since <= since:
-                # No forward progress; if we've already passed the end or got nothing, stop.
-                if last_trade_ts is None or last_trade_ts >= day_end:
-                    break
-            since = new_since
-
-        if verbose:
-            def to_dt(ns): 
-                return datetime.fromtimestamp(ns / 1_000_000_000, tz=timezone.utc).isoformat()
-            print(f"[i] page={pages} since={since} ({to_dt(since)}) emitted={emitted}", file=sys.stderr)
 
-        time.sleep(rate_delay)
+def _page_to_arrays(trades_raw: List, day_start: float, day_end: float):
+    """
+    Convert one raw /Trades page into window-filtered numpy columns.
+    Returns (times, prices, vols, sides, otypes, misc) or None if no row
+    falls inside [day_start, day_end).
 
-    if verbose:
-        print(f"[i] done after {pages} pages (since >= end_ns? {since >= end_ns})", file=sys.stderr)
+    Kraken returns pages in ascending timestamp order, so the window is a
+    contiguous slice: two binary searches find it, and the remaining
+    columns are only materialized for the in-window rows.
+    """
+    n = len(trades_raw)
+    if n == 0:
+        return None
+    times = np.fromiter((row[2] for row in trades_raw), np.float64, n)
+    lo = int(np.searchsorted(times, day_start, side="left"))
+    hi = int(np.searchsorted(times, day_end, side="left"))
+    if lo >= hi:
+        return None
+    window = trades_raw[lo:hi] if (lo, hi) != (0, n) else trades_raw
+    m = hi - lo
+    prices = np.fromiter((row[0] for row in window), np.float64, m)
+    vols = np.fromiter((row[1] for row in window), np.float64, m)
+    sides = np.fromiter((0 if row[3] == "b" else 1 for row in window), np.uint8, m)
+    otypes = np.fromiter((0 if row[4] == "m" else 1 for row in window), np.uint8, m)
+    misc = [row[5] if len(row) > 5 else "" for row in window]
+    return times[lo:hi], prices, vols, sides, otypes, misc
+
+
+def _cat_soa_parts(pair_alt: str, time_parts, price_parts, vol_parts,
+                   side_parts, otype_parts, misc: List[str]) -> Dict:
+    """Concatenate per-page column chunks into one SoA dict."""
+    def cat(parts, dtype):
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    return {
+        "pair": pair_alt,
+        "price": cat(price_parts, np.float64),
+        "volume": cat(vol_parts, np.float64),
+        "time": cat(time_parts, np.float64),
+        "side": cat(side_parts, np.uint8),
+        "ordertype": cat(otype_parts, np.uint8),
+        "misc": misc,
+    }
+
+
+def fetch_trades_for_day_soa(session: requests.Session, pair_alt: str,
+                             day_start: float, day_end: float,
+                             rate_delay: float = 1.1, verbose=True) -> Dict:
+    """
+    Column-oriented variant of fetch_trades_for_day: instead of one dict per
+    trade (~300 bytes of object overhead each), pages are converted straight
+    into numpy columns. Returns a dict with 'pair' (str), float64 arrays
+    'price'/'volume'/'time', uint8 code arrays 'side'/'ordertype' (indices
+    into SIDE_CODES/ORDERTYPE_CODES) and a 'misc' list of str.
+    """
+    if np is None:
+        raise RuntimeError("numpy not installed; use fetch_trades_for_day instead.")
+
+    price_parts, vol_parts, time_parts, side_parts, otype_parts = [], [], [], [], []
+    misc: List[str] = []
+
+    for trades_raw in _iter_trade_pages(session, pair_alt, day_start, day_end,
+                                        rate_delay=rate_delay, verbose=verbose):
+        page = _page_to_arrays(trades_raw, day_start, day_end)
+        if page is None:
+            continue
+        times, prices, vols, sides, otypes, page_misc = page
+        time_parts.append(times)
+        price_parts.append(prices)
+        vol_parts.append(vols)
+        side_parts.append(sides)
+        otype_parts.append(otypes)
+        misc.extend(page_misc)
+
+    return _cat_soa_parts(pair_alt, time_parts, price_parts, vol_parts,
+                          side_parts, otype_parts, misc)
+
+
+
+
+# Encoded JSONL lines are joined and handed to the gzip stream in slabs
+# of this many trades (~400 kB) rather than one short write per trade.
+JSONL_BATCH_LINES = 4096
+
+# Compact-JSON-to-bytes encoder shared by every serialization hot path
+if orjson is not None:
+    _dumps = orjson.dumps
+else:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+@contextmanager
+def _jsonl_sink(out_path: str, level: int):
+    """Open a compressed binary sink for JSONL output (.gz or .zst)."""
+    if out_path.endswith(".zst"):
+        if zstd is None:
+            raise RuntimeError("zstandard not installed; cannot write .zst. pip install zstandard")
+        # threads=-1 spreads frame compression across cores; level 3 is the
+        # same speed/ratio knee as for Parquet row groups.
+        cctx = zstd.ZstdCompressor(level=3, threads=-1)
+        with open(out_path, "wb") as raw, cctx.stream_writer(raw) as f:
+            yield f
+        return
+    if igzip is not None:
+        level = min(level, 3)  # isal levels stop at 3
+    gz_cls = getattr(gz, "GzipFile", None) or gz.IGzipFile
+    # mtime=0 pins the header timestamp so identical captures produce
+    # byte-identical files (dedup/rsync-friendly)
+    with open(out_path, "wb") as raw, \
+            gz_cls(fileobj=raw, mode="wb", compresslevel=level, mtime=0) as f:
+        yield f
+
+
+def write_jsonl_gz(trades_iter: Iterable[Dict], out_path: str,
+                   level: int = GZIP_LEVEL) -> int:
+    # Encoded lines are collected and joined into JSONL_BATCH_LINES-sized
+    # slabs, so the compressor sees one call per slab instead of one per
+    # trade; _dumps emits bytes directly (no text-encode wrapper).
+    count = 0
+    batch: List[bytes] = []
+    with _jsonl_sink(out_path, level) as f:
+        for t in trades_iter:
+            batch.append(_dumps(t) + b"\n")
+            if len(batch) >= JSONL_BATCH_LINES:
+                f.write(b"".join(batch))
+                count += len(batch)
+                batch.clear()
+        if batch:
+            f.write(b"".join(batch))
+            count += len(batch)
+    return count
 
+def write_parquet_zstd(trades_iter: Iterable[Dict], out_path: str) -> int:
+    """
+    Write trades as Parquet with Zstandard compression.
 
+    Columnar + zstd is ~3-5x smaller than JSONL.GZ for tick data and
+    decompresses several times faster, so replays skip JSON decode entirely.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow not installed; cannot write Parquet.")
+    dict_str = pa.dictionary(pa.int8(), pa.string())
+    schema = pa.schema([
+        ("pair", dict_str),
+        ("price", pa.float64()),
+        ("volume", pa.float64()),
+        ("time", pa.float64()),
+        ("side", dict_str),
+        ("ordertype", dict_str),
+        ("misc", dict_str),
+    ])
+    cols = {name: [] for name in schema.names}
+    count = 0
+    writer = pq.ParquetWriter(out_path, schema, compression="zstd",
+                              compression_level=3, use_dictionary=True)
 
+    def flush():
+        nonlocal count
+        count += len(cols["price"])
+        writer.write_table(pa.table(
+            {n: pa.array(cols[n], type=schema.field(n).type) for n in schema.names}))
+        for lst in cols.values():
+            lst.clear()
 
-def write_jsonl_gz(trades_iter: Iterable[Dict], out_path: str) -> int:
-    count = 0
-    with gzip.open(out_path, "wt", encoding="utf-8") as f:
+    try:
+        # Stream one row group per PARQUET_BATCH_ROWS trades; peak memory is
+        # one batch, not the whole day.
         for t in trades_iter:
-            f.write(json.dumps(t, separators=(",", ":")) + "\n")
-            count += 1
+            for name in schema.names:
+                cols[name].append(t[name])
+            if len(cols["price"]) >= PARQUET_BATCH_ROWS:
+                flush()
+        if cols["price"] or count == 0:
+            flush()
+    finally:
+        writer.close()
     return count
 
-def load_jsonl_gz_to_df(path: str):
+
+def _dt_index_from_seconds(time_arr):
+    """
+    UTC DatetimeIndex from float epoch seconds via an explicit int64 ns
+    cast. Kraken's REST feed delivers the trade time as a JSON double, so
+    sub-microsecond exactness is already bounded upstream; converting to
+    int64 ourselves keeps the ns values identical everywhere they're used
+    (index, replay pacing deadlines, second bucketing) instead of leaving
+    each call site its own float path.
+    """
+    ns = (np.asarray(time_arr, dtype=np.float64) * 1e9).astype(np.int64)
+    return pd.to_datetime(ns, unit="ns", utc=True)
+
+
+def iter_soa_trades(cols: Dict) -> Iterable[Dict]:
+    """Yield per-trade dicts from a fetch_trades_for_day_soa column dict."""
+    pair = cols["pair"]
+    misc = cols["misc"]
+    for i in range(len(cols["price"])):
+        yield {
+            "pair": pair,
+            "price": float(cols["price"][i]),
+            "volume": float(cols["volume"][i]),
+            "time": float(cols["time"][i]),
+            "side": SIDE_CODES[cols["side"][i]],
+            "ordertype": ORDERTYPE_CODES[cols["ordertype"][i]],
+            "misc": misc[i],
+        }
+
+
+def df_from_soa(cols: Dict):
+    """
+    Build the standard trades DataFrame straight from SoA columns -- no
+    serialize/re-read of a compressed intermediate.
+
+    The constant/low-cardinality string columns (pair, side, ordertype,
+    misc) come out as pandas Categoricals built directly from the uint8
+    codes, so no per-row str objects are ever materialized and
+    to_parquet dictionary-encodes them for free.
+    """
     if pd is None:
-        raise RuntimeError("pandas not installed; cannot build Parquet/sec-bars.")
-    rows = []
-    with gzip.open(path, "rt", encoding="utf-8") as f:
-        for line in f:
-            rows.append(json.loads(line))
-    df = pd.DataFrame(rows)
+        raise RuntimeError("pandas not installed; cannot build DataFrame.")
+    n = len(cols["price"])
+    df = pd.DataFrame({
+        "pair": pd.Categorical.from_codes(np.zeros(n, dtype=np.int8),
+                                          categories=[cols["pair"]]),
+        "price": cols["price"],
+        "volume": cols["volume"],
+        "time": cols["time"],
+        "side": pd.Categorical.from_codes(cols["side"].astype(np.int8),
+                                          categories=list(SIDE_CODES)),
+        "ordertype": pd.Categorical.from_codes(cols["ordertype"].astype(np.int8),
+                                               categories=list(ORDERTYPE_CODES)),
+        "misc": pd.Categorical(cols["misc"]),
+    }, copy=False)
+    if not df.empty:
+        df["datetime"] = _dt_index_from_seconds(df["time"].to_numpy())
+        df.set_index("datetime", inplace=True)
+    return df
+
+
+# Row-group size for the streaming Parquet writer: big enough for good
+# compression, small enough that peak memory is one batch, not the day.
+PARQUET_BATCH_ROWS = 50_000
+
+
+def _soa_table(cols: Dict) -> "pa.Table":
+    """Arrow table over SoA columns -- no per-row conversion."""
+    n = len(cols["price"])
+    return pa.table({
+        "pair": pa.DictionaryArray.from_arrays(
+            np.zeros(n, dtype=np.int8), [cols["pair"]]),
+        "price": pa.array(cols["price"], type=pa.float64()),
+        "volume": pa.array(cols["volume"], type=pa.float64()),
+        "time": pa.array(cols["time"], type=pa.float64()),
+        "side": pa.DictionaryArray.from_arrays(
+            cols["side"].astype(np.int8), list(SIDE_CODES)),
+        "ordertype": pa.DictionaryArray.from_arrays(
+            cols["ordertype"].astype(np.int8), list(ORDERTYPE_CODES)),
+        "misc": pa.array(cols["misc"], type=pa.dictionary(pa.int8(), pa.string())),
+    })
+
+
+def write_parquet_soa(cols: Dict, out_path: str) -> int:
+    """
+    Write a fetch_trades_for_day_soa column dict as Parquet/zstd.
+    The numpy columns are handed to Arrow without per-row conversion;
+    side/ordertype codes become dictionary arrays directly.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow not installed; cannot write Parquet.")
+    tbl = _soa_table(cols)
+    pq.write_table(tbl, out_path, compression="zstd", compression_level=3,
+                   use_dictionary=True)
+    return tbl.num_rows
+
+
+def capture_day_parquet(session: requests.Session, pair_alt: str,
+                        day_start: float, day_end: float, out_path: str,
+                        rate_delay: float = 1.1, verbose=True,
+                        batch_rows: int = PARQUET_BATCH_ROWS) -> int:
+    """
+    Stream trades straight into a Parquet file: pages accumulate in SoA
+    buffers and flush to the ParquetWriter as a row group every batch_rows,
+    so peak memory is one batch rather than the whole day.
+    """
+    if pa is None or np is None:
+        raise RuntimeError("pyarrow and numpy required for streaming Parquet capture.")
+
+    writer = None
+    total = 0
+    time_parts, price_parts, vol_parts, side_parts, otype_parts = [], [], [], [], []
+    misc: List[str] = []
+    buffered = 0
+
+    def flush():
+        nonlocal writer, total, buffered
+        nonlocal time_parts, price_parts, vol_parts, side_parts, otype_parts, misc
+        if buffered == 0:
+            return
+        tbl = _soa_table(_cat_soa_parts(pair_alt, time_parts, price_parts,
+                                        vol_parts, side_parts, otype_parts, misc))
+        if writer is None:
+            writer = pq.ParquetWriter(out_path, tbl.schema, compression="zstd",
+                                      compression_level=3, use_dictionary=True)
+        writer.write_table(tbl)
+        total += tbl.num_rows
+        time_parts, price_parts, vol_parts, side_parts, otype_parts = [], [], [], [], []
+        misc = []
+        buffered = 0
+
+    try:
+        for trades_raw in _iter_trade_pages(session, pair_alt, day_start, day_end,
+                                            rate_delay=rate_delay, verbose=verbose):
+            page = _page_to_arrays(trades_raw, day_start, day_end)
+            if page is None:
+                continue
+            times, prices, vols, sides, otypes, page_misc = page
+            time_parts.append(times)
+            price_parts.append(prices)
+            vol_parts.append(vols)
+            side_parts.append(sides)
+            otype_parts.append(otypes)
+            misc.extend(page_misc)
+            buffered += len(times)
+            if buffered >= batch_rows:
+                flush()
+        if buffered or writer is None:
+            flush()
+            if writer is None:
+                # Empty day: still produce a valid (zero-row) file
+                tbl = _soa_table(_cat_soa_parts(pair_alt, [], [], [], [], [], []))
+                writer = pq.ParquetWriter(out_path, tbl.schema, compression="zstd",
+                                          compression_level=3, use_dictionary=True)
+                writer.write_table(tbl)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def write_day(trades_iter: Iterable[Dict], out_path: str) -> int:
+    """Write trades to out_path, dispatching on extension (.parquet / .jsonl.gz / .jsonl.zst)."""
+    if out_path.endswith(".parquet"):
+        return write_parquet_zstd(trades_iter, out_path)
+    return write_jsonl_gz(trades_iter, out_path)
+
+
+def load_parquet_to_df(path: str, pair_filter: Optional[str] = None):
+    if pd is None:
+        raise RuntimeError("pandas not installed; cannot load Parquet.")
+    # Captures store the Kraken altname (already slashless upper), so a
+    # normalized filter pushes down as plain row-group equality.
+    filters = [("pair", "==", pair_filter)] if pair_filter is not None else None
+    df = pd.read_parquet(path, filters=filters)
     if not df.empty:
-        df["datetime"] = pd.to_datetime(df["time"], unit="s", utc=True)
+        # Dictionary columns come back as category; plain str is what the
+        # replay filters expect.
+        for col in ("pair", "side", "ordertype", "misc"):
+            if col in df.columns:
+                df[col] = df[col].astype(str)
+        df["datetime"] = _dt_index_from_seconds(df["time"].to_numpy())
         df.set_index("datetime", inplace=True)
     return df
 
+
+def _preferred_replay_source(path: str) -> str:
+    """
+    Prefer a sibling .parquet over a compressed JSONL tape when one exists
+    and is no older: columnar reads skip the JSON parse entirely.
+    """
+    p = str(path)
+    for suffix in (".jsonl.gz", ".jsonl.zst"):
+        if p.endswith(suffix):
+            sib = p[: -len(suffix)] + ".parquet"
+            try:
+                if os.path.exists(sib) and os.path.getmtime(sib) >= os.path.getmtime(p):
+                    return sib
+            except OSError:
+                pass
+    return p
+
+
+def load_day_to_df(path: str, pair_filter: Optional[str] = None):
+    """Load a day of trades, dispatching on extension (.parquet / .jsonl.gz / .jsonl.zst)."""
+    if str(path).endswith(".parquet"):
+        return load_parquet_to_df(path, pair_filter=pair_filter)
+    return load_jsonl_gz_to_df(path, pair_filter=pair_filter)
+
+
+def _open_gz_read(path: str):
+    """
+    Binary reader for a .gz or .zst file. Large gzip days go through
+    rapidgzip, which spreads DEFLATE back-reference resolution across
+    cores; gzip's serial dependency otherwise caps decompression at
+    single-thread speed. Zstandard frames decompress several times
+    faster than DEFLATE to begin with.
+    """
+    if path.endswith(".zst"):
+        if zstd is None:
+            raise RuntimeError("zstandard not installed; cannot read .zst. pip install zstandard")
+        return io.BufferedReader(
+            zstd.ZstdDecompressor().stream_reader(open(path, "rb")),
+            buffer_size=READ_BUFFER_BYTES)
+    if rapidgzip is not None and os.path.getsize(path) > PARALLEL_GUNZIP_MIN_BYTES:
+        return rapidgzip.RapidgzipFile(path, parallelization=os.cpu_count())
+    # Line iteration over a bare GzipFile issues many small reads; a big
+    # BufferedReader in front turns those into 1 MiB pulls from the codec.
+    return io.BufferedReader(gz.open(path, "rb"), buffer_size=READ_BUFFER_BYTES)
+
+
+# Known trade-record schema: lets pyarrow's native JSON parser skip type
+# inference and hands back typed columns with no Python objects in between.
+_TRADE_JSON_SCHEMA = None
+if pa is not None:
+    _TRADE_JSON_SCHEMA = pa.schema([
+        ("pair", pa.string()),
+        ("price", pa.float64()),
+        ("volume", pa.float64()),
+        ("time", pa.float64()),
+        ("side", pa.string()),
+        ("ordertype", pa.string()),
+        ("misc", pa.string()),
+    ])
+
+
+def _load_jsonl_gz_arrow(path: str, pair_filter: Optional[str] = None):
+    """Parse a trades JSONL.GZ with pyarrow's C++ JSON reader."""
+    with _open_gz_read(path) as f:
+        tbl = pa_json.read_json(
+            f, parse_options=pa_json.ParseOptions(
+                explicit_schema=_TRADE_JSON_SCHEMA))
+    if pair_filter is not None and tbl.num_rows:
+        norm = pa_compute.utf8_upper(
+            pa_compute.replace_substring(tbl["pair"], "/", ""))
+        tbl = tbl.filter(pa_compute.equal(norm, pair_filter))
+    if tbl.num_rows == 0:
+        return pd.DataFrame()
+    # split_blocks + self_destruct hand Arrow buffers to pandas column by
+    # column instead of holding table and frame fully alive at once
+    df = tbl.to_pandas(split_blocks=True, self_destruct=True)
+    del tbl
+    df["datetime"] = _dt_index_from_seconds(df["time"].to_numpy())
+    df.set_index("datetime", inplace=True)
+    return df
+
+
+# Boxed-float lists in the fallback JSONL loader are packed into numpy
+# chunks at this cadence, bounding Python-heap growth on big days.
+_LOAD_CHUNK_ROWS = 250_000
+
+
+def load_jsonl_gz_to_df(path: str, pair_filter: Optional[str] = None):
+    """
+    Load a trades JSONL file. pair_filter (normalized: slashless, upper)
+    drops other symbols during the parse, before any DataFrame exists.
+    """
+    if pd is None:
+        raise RuntimeError("pandas not installed; cannot build Parquet/sec-bars.")
+    if pa_json is not None:
+        # C++ line parser with a pinned schema: no per-line Python dicts,
+        # no type inference.
+        return _load_jsonl_gz_arrow(path, pair_filter=pair_filter)
+    # Read bytes and decode with orjson when available: skips the text-decode
+    # step and is several times faster than stdlib json on the per-line path.
+    # Fill per-column lists as we parse (SoA) and flush them into packed
+    # numpy chunks every _LOAD_CHUNK_ROWS lines, so the Python heap never
+    # holds more than one chunk of boxed floats regardless of day size.
+    loads = orjson.loads if orjson is not None else json.loads
+    num_parts = {"price": [], "volume": [], "time": []}
+    pairs, sides, otypes, miscs = [], [], [], []
+    prices, volumes, times = [], [], []
+
+    def flush():
+        if not times:
+            return
+        num_parts["price"].append(np.asarray(prices, dtype=np.float64))
+        num_parts["volume"].append(np.asarray(volumes, dtype=np.float64))
+        num_parts["time"].append(np.asarray(times, dtype=np.float64))
+        prices.clear()
+        volumes.clear()
+        times.clear()
+
+    # Tiny memo: normalizing the (usually constant) pair once per distinct
+    # value instead of replace/upper per line.
+    norm_cache: Dict[str, str] = {}
+    with _open_gz_read(path) as f:
+        for line in f:
+            r = loads(line)
+            if pair_filter is not None:
+                raw_pair = r["pair"]
+                norm = norm_cache.get(raw_pair)
+                if norm is None:
+                    norm = raw_pair.replace("/", "").upper()
+                    norm_cache[raw_pair] = norm
+                if norm != pair_filter:
+                    continue
+            pairs.append(sys.intern(r["pair"]))
+            prices.append(r["price"])
+            volumes.append(r["volume"])
+            times.append(r["time"])
+            sides.append(sys.intern(r.get("side", "")))
+            otypes.append(sys.intern(r.get("ordertype", "")))
+            miscs.append(sys.intern(r.get("misc", "")))
+            if len(times) >= _LOAD_CHUNK_ROWS:
+                flush()
+    flush()
+    if not num_parts["time"]:
+        return pd.DataFrame()
+    time_arr = np.concatenate(num_parts["time"])
+    df = pd.DataFrame({
+        "pair": pd.Categorical(pairs),
+        "price": np.concatenate(num_parts["price"]),
+        "volume": np.concatenate(num_parts["volume"]),
+        "time": time_arr,
+        "side": pd.Categorical(sides),
+        "ordertype": pd.Categorical(otypes),
+        "misc": pd.Categorical(miscs),
+    })
+    df["datetime"] = _dt_index_from_seconds(time_arr)
+    df.set_index("datetime", inplace=True)
+    return df
+
 def save_parquet(df, path: str):
+    """
+    Write a DataFrame as zstd-compressed Parquet. ZSTD level 3 beats both
+    snappy (size) and gzip (speed) on this data; categorical columns come
+    out dictionary-encoded automatically. Falls back to the engine
+    defaults when pyarrow isn't the backend.
+    """
     if pd is None:
         raise RuntimeError("pandas not installed; cannot write Parquet.")
     try:
-        df.to_parquet(path, index=True)
+        if pa is not None:
+            df.to_parquet(path, index=True, engine="pyarrow",
+                          compression="zstd", compression_level=3,
+                          row_group_size=200_000)
+        else:
+            df.to_parquet(path, index=True)
     except Exception as e:
         raise RuntimeError(f"Writing Parquet failed (install pyarrow or fastparquet): {e}")
 
+if numba is not None:
+    @numba.njit(cache=True)
+    def _bars_kernel(sec, price, vol):
+        """
+        Fused O/H/L/C/V/N/PV aggregation in one sequential scan over
+        sorted per-trade arrays, branching on new-second transitions.
+        Compiles once per process (cached on disk); after that it is a
+        plain C loop with no temporaries.
+        """
+        n = sec.shape[0]
+        nbars = 1
+        for i in range(1, n):
+            if sec[i] != sec[i - 1]:
+                nbars += 1
+        bar_sec = np.empty(nbars, np.int64)
+        o = np.empty(nbars, np.float64)
+        h = np.empty(nbars, np.float64)
+        lo = np.empty(nbars, np.float64)
+        c = np.empty(nbars, np.float64)
+        v = np.zeros(nbars, np.float64)
+        pv = np.zeros(nbars, np.float64)
+        cnt = np.zeros(nbars, np.int64)
+        j = -1
+        for i in range(n):
+            p = price[i]
+            if j < 0 or sec[i] != bar_sec[j]:
+                j += 1
+                bar_sec[j] = sec[i]
+                o[j] = p
+                h[j] = p
+                lo[j] = p
+            else:
+                if p > h[j]:
+                    h[j] = p
+                if p < lo[j]:
+                    lo[j] = p
+            c[j] = p
+            v[j] += vol[i]
+            pv[j] += p * vol[i]
+            cnt[j] += 1
+        return bar_sec, o, h, lo, c, v, cnt, pv
+
+
 def make_second_bars(df):
     """
     Build per-second OHLCV from trades.
     close = last price in the second
     volume = sum volume in the second
     vwap, trades count also included.
+
+    Single vectorized pass over the trade arrays (a fused numba kernel
+    when available, reduceat on per-second runs otherwise) instead of
+    seven separate resample groupings. Seconds with no trades are
+    omitted; downstream already drops empty rows.
     """
     if df.empty:
         return df
 
-    # Price series for O/H/L/C
-    price = df["price"]
-    vol = df["volume"]
+    t = df["time"].to_numpy(dtype=np.float64)
+    price = df["price"].to_numpy(dtype=np.float64)
+    vol = df["volume"].to_numpy(dtype=np.float64)
 
-    # Aggregate to 1-second bins
-    o = price.resample("1S").first().rename("open")
-    h = price.resample("1S").max().rename("high")
-    l = price.resample("1S").min().rename("low")
-    c = price.resample("1S").last().rename("close")
-    v = vol.resample("1S").sum().rename("volume")
-    n = price.resample("1S").count().rename("trades")
+    # Trades arrive near-ordered; only pay for a sort when actually needed.
+    # The index is derived from the time column, so its cached monotonic
+    # flag answers the sortedness question without an O(N) comparison pass.
+    if not df.index.is_monotonic_increasing:
+        order = np.argsort(t, kind="stable")
+        t, price, vol = t[order], price[order], vol[order]
 
-    # VWAP: sum(price*volume) / sum(volume)
-    pv = (price * vol).resample("1S").sum()
-    vwap = (pv / v.replace(0, pd.NA)).rename("vwap")
+    # Epoch seconds are positive, so the int cast truncates straight to the
+    # bucket without a separate floor pass over the array
+    sec = t.astype(np.int64)
 
-    bars = pd.concat([o, h, l, c, v, n, vwap], axis=1)
+    if numba is not None:
+        bar_sec, opens, highs, lows, closes, volume, trades, pv = _bars_kernel(
+            sec, price, vol)
+    else:
+        # Run boundaries: one run per populated second
+        starts = np.flatnonzero(np.diff(sec, prepend=sec[0] - 1))
+        ends = np.append(starts[1:], len(sec))
+        bar_sec = sec[starts]
+        opens = price[starts]
+        highs = np.maximum.reduceat(price, starts)
+        lows = np.minimum.reduceat(price, starts)
+        closes = price[ends - 1]
+        volume = np.add.reduceat(vol, starts)
+        trades = ends - starts
+        # Multiply into a preallocated buffer so the price*volume product
+        # doesn't allocate a fresh intermediate on every run
+        pv_buf = np.empty(len(price), dtype=np.float64)
+        np.multiply(price, vol, out=pv_buf)
+        pv = np.add.reduceat(pv_buf, starts)
+
+    # Only populated seconds reach this point, so volume is zero just in
+    # the pathological zero-volume-trade case; divide directly instead of
+    # paying a mask plus np.where select pass over the whole day.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = pv / volume
+
+    bars = pd.DataFrame(
+        {
+            "open": opens,
+            "high": highs,
+            "low": lows,
+            "close": closes,
+            "volume": volume,
+            "trades": trades,
+            "vwap": vwap,
+        },
+        index=pd.to_datetime(bar_sec, unit="s", utc=True),
+        copy=False,
+    )
+    bars.index.name = "datetime"
     return bars
 
+def _index_epoch_seconds(idx) -> np.ndarray:
+    """Float epoch seconds from a DatetimeIndex, honoring its resolution.
+
+    asi8 is expressed in the index's own unit — historically always ns,
+    but pandas 3 keeps to_datetime(unit="s") output at second resolution —
+    so derive the divisor from the dtype instead of hardcoding 1e9.
+    """
+    unit = getattr(idx.dtype, "unit", None)  # DatetimeTZDtype carries it
+    if unit is None:
+        unit = np.datetime_data(idx.dtype)[0]
+    return idx.asi8 / {"s": 1.0, "ms": 1e3, "us": 1e6, "ns": 1e9}[unit]
+
 def replay_trades_by_second(df):
     """
     Generator that yields (second_timestamp, trades_df_for_that_second)
     in chronological order—helpful for simulating a live feed.
+
+    Seconds are found by run-boundary detection on the sorted time column,
+    so each yield is a contiguous iloc slice instead of a pandas Grouper
+    materializing every bucket.
     """
     if df.empty:
         return
-    # Group trades by each second bucket
-    for ts, frame in df.groupby(pd.Grouper(freq="1S")):
-        if not frame.empty:
-            yield ts.to_pydatetime(), frame
+    # Captures come back already time-ordered; only sort (and copy) when not
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    sec = df.index.asi8 // 1_000_000_000
+    starts = np.flatnonzero(np.diff(sec, prepend=sec[0] - 1))
+    ends = np.append(starts[1:], len(sec))
+    for s, e in zip(starts, ends):
+        yield datetime.fromtimestamp(int(sec[s]), tz=timezone.utc), df.iloc[s:e]
+
+
+KRAKEN_WS_URL = "wss://ws.kraken.com/v2"
+
+# v2 trade-channel vocabularies mapped onto the REST path's compact codes
+_WS_SIDE = {"buy": "b", "sell": "s"}
+_WS_ORDERTYPE = {"market": "m", "limit": "l"}
+
+
+def resolve_wsname(session: requests.Session, pair_like: str,
+                   cache_path: Optional[str] = None) -> str:
+    """Resolve a pair to Kraken's wsname ('BTC/USD') for the v2 WS API."""
+    target = pair_like.replace("/", "").upper()
+    data = fetch_assetpairs(session, cache_path=cache_path)
+    for meta in data.values():
+        ws = meta.get("wsname") or ""
+        if ws and (ws.replace("/", "").upper() == target
+                   or meta.get("altname", "").upper() == target):
+            return ws
+    return pair_like
+
+
+async def stream_trades_ws(ws_symbol: str, pair_alt: str,
+                           until_ts: Optional[float] = None) -> Iterable[Dict]:
+    """
+    Async generator over Kraken's v2 trade WebSocket channel, yielding the
+    same dict schema as fetch_trades_for_day. For forward-looking windows
+    one subscription replaces REST polling: trades arrive push-style with
+    no rate-delay pacing. Stops once a trade at/after until_ts arrives.
+    """
+    if websockets is None:
+        raise RuntimeError("Install websockets: pip install websockets")
+    loads = orjson.loads if orjson is not None else json.loads
+    sub = _dumps({"method": "subscribe",
+                  "params": {"channel": "trade", "symbol": [ws_symbol]}})
+    async with websockets.connect(KRAKEN_WS_URL) as ws:
+        await ws.send(sub)
+        async for raw in ws:
+            msg = loads(raw)
+            if msg.get("channel") != "trade":
+                continue
+            for t in msg.get("data", []):
+                ts = datetime.fromisoformat(
+                    t["timestamp"].replace("Z", "+00:00")).timestamp()
+                if until_ts is not None and ts >= until_ts:
+                    return
+                yield {
+                    "pair": pair_alt,
+                    "price": float(t["price"]),
+                    "volume": float(t["qty"]),
+                    "time": ts,
+                    "side": _WS_SIDE.get(t.get("side"), ""),
+                    "ordertype": _WS_ORDERTYPE.get(t.get("ord_type"), ""),
+                    "misc": "",
+                }
+
+
+async def capture_live_ws(ws_symbol: str, pair_alt: str, out_path: str,
+                          duration_s: float, level: int = GZIP_LEVEL) -> int:
+    """
+    Capture the live trade feed for duration_s seconds into out_path,
+    streaming the same joined slabs as write_jsonl_gz so a long session
+    never holds the tape in memory. The timeout guards against a quiet
+    feed never delivering the trade that would cross until_ts.
+    """
+    until = time.time() + duration_s
+    count = 0
+    batch: List[bytes] = []
+    with _jsonl_sink(out_path, level) as f:
+        try:
+            async with asyncio.timeout(duration_s + 5):
+                async for t in stream_trades_ws(ws_symbol, pair_alt, until_ts=until):
+                    batch.append(_dumps(t) + b"\n")
+                    if len(batch) >= JSONL_BATCH_LINES:
+                        f.write(b"".join(batch))
+                        count += len(batch)
+                        batch.clear()
+        except TimeoutError:
+            pass
+        if batch:
+            f.write(b"".join(batch))
+            count += len(batch)
+    return count
 
 
-def replay_file(path: str, pace: float = 1.0, emit_ticks: bool = False, symbol: Optional[str] = None):
+def _make_stdout_emitter(line_buffered: bool):
+    """
+    Return (emit, flush) callables writing compact JSON lines to stdout.
+    Unless line_buffered, lines accumulate in a bytearray flushed in ~64 kB
+    blocks -- per-line print() lock/flush overhead caps --pace 0 throughput.
+    """
+    out = sys.stdout.buffer
+    buf = bytearray()
+
+    def emit(obj):
+        buf.extend(_dumps(obj))
+        buf.extend(b"\n")
+        if line_buffered or len(buf) >= (1 << 16):
+            out.write(buf)
+            buf.clear()
+            if line_buffered:
+                out.flush()
+
+    def flush():
+        if buf:
+            out.write(buf)
+            buf.clear()
+        out.flush()
+
+    return emit, flush
+
+
+def replay_file(path: str, pace: float = 1.0, emit_ticks: bool = False,
+                symbol: Optional[str] = None, line_buffered: bool = False):
     """
     Read a JSONL.GZ produced by this script and print JSON lines to stdout,
     paced by original timestamps.
 
     Default output: per-second OHLCV bars (one JSON per populated second).
     With --ticks: raw trades (one JSON per trade).
+
+    Paced replays flush per line (consumers expect timely delivery);
+    --pace <= 0 block-buffers unless line_buffered forces otherwise.
     """
     if pd is None:
         raise RuntimeError("pandas is required for replay mode. pip install pandas")
 
-    df = load_jsonl_gz_to_df(path)
+    want = symbol.replace("/", "").upper() if symbol else None
+    df = load_day_to_df(_preferred_replay_source(path), pair_filter=want)
     if df.empty:
         return
 
-    if symbol:
-        want = symbol.replace("/", "").upper()
-        df = df[df["pair"].str.replace("/", "", regex=False).str.upper() == want]
-        if df.empty:
-            return
-
     import math, time as _time
 
+    emit, flush = _make_stdout_emitter(line_buffered or pace > 0)
+
     if emit_ticks:
-        # Emit raw trades, paced by original trade times
-        first_ts = None
-        wall0 = _time.monotonic()
-        for _, t in df.sort_index().iterrows():
-            ts = float(t["time"])
-            if first_ts is None:
-                first_ts = ts
-                wall0 = _time.monotonic()
-            if pace > 0:
-                elapsed_src = ts - first_ts
-                elapsed_wall = _time.monotonic() - wall0
-                delay = (elapsed_src / pace) - elapsed_wall
-                if delay > 0:
-                    _time.sleep(delay)
+        # Emit raw trades, paced by original trade times. Raw numpy columns
+        # instead of iterrows: no per-row Series boxing in the hot loop.
+        df = df.sort_index()
+        pairs = df["pair"].to_numpy()
+        prices = df["price"].to_numpy(dtype=np.float64)
+        vols = df["volume"].to_numpy(dtype=np.float64)
+        times = df["time"].to_numpy(dtype=np.float64)
+        sides = df["side"].to_numpy() if "side" in df.columns else None
+        ords = df["ordertype"].to_numpy() if "ordertype" in df.columns else None
+        miscs = df["misc"].to_numpy() if "misc" in df.columns else None
+
+        # Absolute ns deadlines computed once up front: each row sleeps until
+        # its own target instead of re-deriving elapsed-src minus elapsed-wall
+        # floats per row (which drifts at high pace factors).
+        targets_ns = None
+        if pace > 0 and len(times):
+            times_ns = (times * 1e9).astype(np.int64)
+            wall0_ns = _time.monotonic_ns()
+            targets_ns = wall0_ns + ((times_ns - times_ns[0]) / pace).astype(np.int64)
+        for i in range(len(df)):
+            ts = float(times[i])
+            if targets_ns is not None:
+                dt_ns = targets_ns[i] - _time.monotonic_ns()
+                if dt_ns > 0:
+                    _time.sleep(dt_ns / 1e9)
             out = {
                 "type": "tick",
-                "pair": str(t["pair"]),
-                "price": float(t["price"]),
-                "volume": float(t["volume"]),
-                "time": float(t["time"]),
-                "side": str(t.get("side", "")),
-                "ordertype": str(t.get("ordertype", "")),
-                "misc": str(t.get("misc", "")),
+                "pair": str(pairs[i]),
+                "price": float(prices[i]),
+                "volume": float(vols[i]),
+                "time": ts,
+                "side": str(sides[i]) if sides is not None else "",
+                "ordertype": str(ords[i]) if ords is not None else "",
+                "misc": str(miscs[i]) if miscs is not None else "",
             }
-            print(json.dumps(out, separators=(",", ":")))
+            emit(out)
+        flush()
     else:
         # Emit per-second OHLCV bars (skip empty seconds)
         bars = make_second_bars(df)
         if bars.empty:
             return
-        bars = bars.dropna(subset=["close"], how="all").sort_index()
+        # make_second_bars only emits populated seconds, already sorted
+        bars = bars.sort_index()
 
-        first_sec_ts = None
-        wall0 = _time.monotonic()
         # Attempt to include a single pair if file is 1 symbol; else omit.
         pair_val = None
         try:
@@ -348,92 +1307,135 @@ def replay_file(path: str, pace: float = 1.0, emit_ticks: bool = False, symbol:
         except Exception:
             pair_val = None
 
-        for ts, row in bars.iterrows():
-            sec_ts = ts.timestamp()
-            if first_sec_ts is None:
-                first_sec_ts = sec_ts
-                wall0 = _time.monotonic()
-            if pace > 0:
-                elapsed_src = sec_ts - first_sec_ts
-                elapsed_wall = _time.monotonic() - wall0
-                delay = (elapsed_src / pace) - elapsed_wall
-                if delay > 0:
-                    _time.sleep(delay)
-            out = {
-                "type": "secbar",
-                "ts": ts.isoformat(),
-                **({"pair": str(pair_val)} if pair_val else {}),
-                "open": None if pd.isna(row.get("open")) else float(row["open"]),
-                "high": None if pd.isna(row.get("high")) else float(row["high"]),
-                "low":  None if pd.isna(row.get("low"))  else float(row["low"]),
-                "close": None if pd.isna(row.get("close")) else float(row["close"]),
-                "volume": 0.0 if pd.isna(row.get("volume")) else float(row["volume"]),
-                "trades": int(row.get("trades", 0)) if not pd.isna(row.get("trades", 0)) else 0,
-                "vwap": None if pd.isna(row.get("vwap")) else float(row["vwap"]),
-            }
-            print(json.dumps(out, separators=(",", ":")))
+        # Same absolute-deadline pacing as the tick branch, over bar seconds
+        # (unit-aware: the bar index is second-resolution under pandas 3)
+        targets_ns = None
+        if pace > 0 and len(bars):
+            src_s = _index_epoch_seconds(bars.index)
+            wall0_ns = _time.monotonic_ns()
+            targets_ns = wall0_ns + ((src_s - src_s[0]) * 1e9 / pace).astype(np.int64)
+
+        for i, (_, out) in enumerate(_iter_secbar_payloads(bars, pair_val)):
+            if targets_ns is not None:
+                dt_ns = targets_ns[i] - _time.monotonic_ns()
+                if dt_ns > 0:
+                    _time.sleep(dt_ns / 1e9)
+            emit(out)
+        flush()
 
 
 def _build_df_for_replay(path: str, symbol: Optional[str]):
     if pd is None:
         raise RuntimeError("pandas is required for replay mode. pip install pandas")
-    df = load_jsonl_gz_to_df(path)
+    want = symbol.replace("/", "").upper() if symbol else None
+    df = load_day_to_df(_preferred_replay_source(path), pair_filter=want)
     if df.empty:
         return df
-    if symbol:
-        want = symbol.replace("/", "").upper()
-        df = df[df["pair"].str.replace("/", "", regex=False).str.upper() == want]
     return df.sort_index()
 
-def _gen_tick_messages(df):
-    """Yield (src_ts_seconds_float, json_line) for raw trades."""
-    for _, t in df.iterrows():
-        src_ts = float(t["time"])
+def _wire_dumps(wire: str):
+    """Frame serializer for WS replay: JSON (default) or msgpack.
+
+    msgpack skips text tokenization on both ends and decodes floats/ints at
+    fixed size; it needs a msgpack-aware client (ws_price_viewer --wire
+    msgpack).
+    """
+    if wire == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("--wire msgpack requires msgpack. pip install msgpack")
+        return msgpack.packb
+    return _dumps
+
+def _gen_tick_messages(df, dumps=_dumps):
+    """Yield (src_ts_seconds_float, payload_bytes) for raw trades."""
+    # Raw numpy columns instead of iterrows: no per-row Series boxing.
+    # _dumps routes through orjson when installed.
+    pairs = df["pair"].to_numpy()
+    prices = df["price"].to_numpy(dtype=np.float64)
+    vols = df["volume"].to_numpy(dtype=np.float64)
+    times = df["time"].to_numpy(dtype=np.float64)
+    sides = df["side"].to_numpy() if "side" in df.columns else None
+    ords = df["ordertype"].to_numpy() if "ordertype" in df.columns else None
+    miscs = df["misc"].to_numpy() if "misc" in df.columns else None
+    for i in range(len(times)):
+        src_ts = float(times[i])
         out = {
             "type": "tick",
-            "pair": str(t["pair"]),
-            "price": float(t["price"]),
-            "volume": float(t["volume"]),
-            "time": float(t["time"]),
-            "side": str(t.get("side", "")),
-            "ordertype": str(t.get("ordertype", "")),
-            "misc": str(t.get("misc", "")),
+            "pair": str(pairs[i]),
+            "price": float(prices[i]),
+            "volume": float(vols[i]),
+            "time": src_ts,
+            "side": str(sides[i]) if sides is not None else "",
+            "ordertype": str(ords[i]) if ords is not None else "",
+            "misc": str(miscs[i]) if miscs is not None else "",
         }
-        yield src_ts, json.dumps(out, separators=(",", ":"))
+        yield src_ts, dumps(out)
 
-def _gen_secbar_messages(df):
-    """Yield (src_ts_seconds_float, json_line) for 1s OHLCV bars."""
+def _iter_secbar_payloads(bars, pair_val):
+    """
+    Yield (src_ts_seconds_float, payload_dict) per bar from numpy columns,
+    avoiding the per-row Series that iterrows would box up.
+    """
+    # Bulk .tolist() converts each column to Python scalars in one C call,
+    # and the NaN->None mapping for vwap happens vectorized up front, so
+    # the loop is plain zip over ready-to-serialize values.
+    opens = bars["open"].to_numpy(dtype=np.float64).tolist()
+    highs = bars["high"].to_numpy(dtype=np.float64).tolist()
+    lows = bars["low"].to_numpy(dtype=np.float64).tolist()
+    closes = bars["close"].to_numpy(dtype=np.float64).tolist()
+    volumes = bars["volume"].to_numpy(dtype=np.float64).tolist()
+    trades = bars["trades"].to_numpy(dtype=np.int64).tolist()
+    vwaps_np = bars["vwap"].to_numpy(dtype=np.float64)
+    vwaps = np.where(np.isnan(vwaps_np), None, vwaps_np).tolist()
+    idx = bars.index
+    isos = [ts.isoformat() for ts in idx]
+    srcs = _index_epoch_seconds(idx).tolist()
+    pair_part = {"pair": str(pair_val)} if pair_val else {}
+    for src_ts, ts_iso, o, h, lo, c, v, n, vw in zip(
+            srcs, isos, opens, highs, lows, closes, volumes, trades, vwaps):
+        out = {
+            "type": "secbar",
+            "ts": ts_iso,
+            **pair_part,
+            "open": o,
+            "high": h,
+            "low": lo,
+            "close": c,
+            "volume": v,
+            "trades": n,
+            "vwap": vw,
+        }
+        yield src_ts, out
+
+
+def _gen_secbar_messages(df, dumps=_dumps):
+    """Yield (src_ts_seconds_float, payload_bytes) for 1s OHLCV bars."""
     bars = make_second_bars(df)
     if bars.empty:
         return
-    bars = bars.dropna(subset=["close"], how="all").sort_index()
+    # make_second_bars only emits populated seconds, already sorted
+    bars = bars.sort_index()
     pair_val = None
     try:
         pair_val = df["pair"].iloc[0]
     except Exception:
         pass
-    for ts, row in bars.iterrows():
-        src_ts = ts.timestamp()
-        out = {
-            "type": "secbar",
-            "ts": ts.isoformat(),
-            **({"pair": str(pair_val)} if pair_val else {}),
-            "open": None if pd.isna(row.get("open")) else float(row["open"]),
-            "high": None if pd.isna(row.get("high")) else float(row["high"]),
-            "low":  None if pd.isna(row.get("low"))  else float(row["low"]),
-            "close": None if pd.isna(row.get("close")) else float(row["close"]),
-            "volume": 0.0 if pd.isna(row.get("volume")) else float(row["volume"]),
-            "trades": int(row.get("trades", 0)) if not pd.isna(row.get("trades", 0)) else 0,
-            "vwap": None if pd.isna(row.get("vwap")) else float(row["vwap"]),
-        }
-        yield src_ts, json.dumps(out, separators=(",", ":"))
+    for src_ts, out in _iter_secbar_payloads(bars, pair_val):
+        yield src_ts, dumps(out)
 
 async def _paced_send(iter_msgs, pace: float, send_func, loop_forever: bool):
     """
-    iter_msgs: callable -> iterator of (src_ts, json_str)
-    send_func: async callable(text)
+    iter_msgs: callable -> iterator of (src_ts, payload_bytes)
+    send_func: async callable(payload)
+
+    Pacing sleeps until an absolute deadline on the event-loop clock --
+    wall0 + (src_ts - first_src) / pace -- the same scheme as the stdout
+    replay. One clock read per message, no accumulated drift from
+    re-deriving elapsed-source minus elapsed-wall differences, and
+    already-late messages skip the sleep entirely.
     """
     loop = asyncio.get_running_loop()
+    scale = (1.0 / pace) if pace > 0 else 0.0
     while True:
         first_src = None
         wall0 = loop.time()
@@ -441,10 +1443,8 @@ async def _paced_send(iter_msgs, pace: float, send_func, loop_forever: bool):
             if first_src is None:
                 first_src = src_ts
                 wall0 = loop.time()
-            if pace > 0:
-                elapsed_src = src_ts - first_src
-                elapsed_wall = loop.time() - wall0
-                delay = (elapsed_src / pace) - elapsed_wall
+            elif scale:
+                delay = wall0 + (src_ts - first_src) * scale - loop.time()
                 if delay > 0:
                     await asyncio.sleep(delay)
             await send_func(payload)
@@ -461,14 +1461,31 @@ async def ws_serve_per_client(args):
     if df.empty:
         print("[!] No data to replay.", file=sys.stderr)
 
-    def make_iter():
-        return _gen_tick_messages(df) if args.ticks else _gen_secbar_messages(df)
+    # Serialize the whole timeline once: every client (and every --loop
+    # pass) replays the cached (src_ts, payload) list instead of paying the
+    # JSON encode per connection. Built lazily on the first connection, in
+    # a worker thread, so startup is instant and the event loop keeps
+    # serving while a big day is encoded.
+    cached: List = []
+    cache_lock = asyncio.Lock()
+
+    async def get_payloads():
+        async with cache_lock:
+            if not cached:
+                dumps = _wire_dumps(getattr(args, "wire", "json"))
+                gen = (_gen_tick_messages(df, dumps) if args.ticks
+                       else _gen_secbar_messages(df, dumps))
+                cached.extend(await asyncio.get_running_loop()
+                              .run_in_executor(None, list, gen))
+        return cached
 
     async def handler(ws, *_, **__):
-        async def send(payload: str):
+        payloads = await get_payloads()
+
+        async def send(payload: bytes):
             await ws.send(payload)
         try:
-            await _paced_send(make_iter, args.pace, send, args.loop)
+            await _paced_send(lambda: iter(payloads), args.pace, send, args.loop)
         except websockets.ConnectionClosed:
             return
 
@@ -498,29 +1515,37 @@ async def ws_serve_shared(args):
             async with clients_lock:
                 clients.discard(ws)
 
-    async def broadcast(payload: str):
+    async def broadcast(payload: bytes):
         # snapshot to avoid mutation during iteration
         async with clients_lock:
             targets = list(clients)
         if not targets:
             return
-        # send concurrently; drop closed clients
-        send_tasks = []
-        for c in targets:
-            send_tasks.append(asyncio.create_task(c.send(payload)))
-        done, pending = await asyncio.wait(send_tasks, return_when=asyncio.ALL_COMPLETED)
-        # clean up failures
-        for t in done:
-            exc = t.exception()
-            if exc:
+        # One pre-encoded payload fanned out in a single gather: no Task
+        # object per client and no O(N^2) task-to-client index lookup on
+        # failure. Clients whose send raised get closed and dropped.
+        results = await asyncio.gather(*(c.send(payload) for c in targets),
+                                       return_exceptions=True)
+        for c, res in zip(targets, results):
+            if isinstance(res, Exception):
                 try:
-                    ws = targets[send_tasks.index(t)]
-                    await ws.close()
+                    await c.close()
                 except Exception:
                     pass
 
+    dumps = _wire_dumps(getattr(args, "wire", "json"))
+
     def make_iter():
-        return _gen_tick_messages(df) if args.ticks else _gen_secbar_messages(df)
+        return (_gen_tick_messages(df, dumps) if args.ticks
+                else _gen_secbar_messages(df, dumps))
+
+    if args.loop:
+        # Loop mode re-walks the timeline forever; serialize it once and
+        # replay the cached payloads instead of re-encoding each pass.
+        cached = list(make_iter())
+
+        def make_iter():
+            return iter(cached)
 
     print(f"[i] WS shared @ ws://{args.ws_host}:{args.ws_port} pace={args.pace} "
           f"mode={'ticks' if args.ticks else 'secbar'} loop={args.loop}")
@@ -535,10 +1560,19 @@ def main():
     # --- capture mode (existing) ---
     ap.add_argument("--pair", help="Kraken market, e.g. XBTUSD or BTC/USD")
     ap.add_argument("--date", help="UTC date YYYY-MM-DD")
-    ap.add_argument("--out", help="Output raw trades JSONL.GZ")
+    ap.add_argument("--out", help="Output raw trades JSONL.GZ "
+                    "(optional when --parquet/--sec-bars is given)")
     ap.add_argument("--parquet", help="Optional: also write raw trades to Parquet")
     ap.add_argument("--sec-bars", help="Optional: write per-second OHLCV Parquet")
     ap.add_argument("--rate-delay", type=float, default=1.1, help="Seconds to sleep between requests")
+    ap.add_argument("--gzip-level", type=int, default=GZIP_LEVEL,
+                    help=f"Compression level for JSONL.GZ output (default {GZIP_LEVEL}; "
+                         "higher is slower for little size gain on trade JSON)")
+    ap.add_argument("--refresh-pairs", action="store_true",
+                    help="Skip the static pair table and resolve against the live AssetPairs catalog")
+    ap.add_argument("--live", action="store_true",
+                    help="Capture forward from now for the --last duration via the "
+                         "Kraken trade WebSocket instead of REST backfill")
 
     # --- replay / print mode ---
     ap.add_argument("--replay", help="Path to trades JSONL.GZ to replay")
@@ -547,6 +1581,8 @@ def main():
     ap.add_argument("--ticks", action="store_true", help="Emit raw trades instead of per-second OHLCV")
     ap.add_argument("--symbol", help="Optional pair filter for replay (e.g., BTCUSD or XBTUSD)")
     ap.add_argument("--loop", action="store_true", help="Loop the replay forever")
+    ap.add_argument("--line-buffered", action="store_true",
+                    help="Flush stdout after every replay line (default for paced replays)")
 
     # --- websocket options ---
     ap.add_argument("--ws", action="store_true", help="Serve the replay over WebSocket instead of printing")
@@ -555,6 +1591,8 @@ def main():
     ap.add_argument("--ws-shared", action="store_true",
                     help="Shared timeline broadcast (all clients see same clock). "
                          "Without this, each client gets its own timeline.")
+    ap.add_argument("--wire", choices=["json", "msgpack"], default="json",
+                    help="WS frame encoding (msgpack needs a msgpack-aware client)")
     ap.add_argument("--tz", default="America/New_York",
                 help="Interpret --date in this IANA timezone (default: America/New_York)")
     ap.add_argument("--last",
@@ -575,16 +1613,36 @@ def main():
 
     # --- stdout replay (no ws) ---
     if args.replay and not args.ws:
-        replay_file(args.replay, pace=args.pace, emit_ticks=args.ticks, symbol=args.symbol)
+        replay_file(args.replay, pace=args.pace, emit_ticks=args.ticks,
+                    symbol=args.symbol, line_buffered=args.line_buffered)
         return
 
 
 
+    # --- live WS capture (forward-looking) ---
+    if args.live:
+        if not args.pair or not args.out or not args.last:
+            ap.error("--live requires --pair, --out and --last")
+        try:
+            duration = parse_duration_to_seconds(args.last)
+        except ValueError as e:
+            ap.error(f"--last {e}")
+        with make_session() as s:
+            pair_alt = resolve_pair(s, args.pair, cache_path=ASSETPAIRS_CACHE_PATH,
+                                    refresh=args.refresh_pairs)
+            ws_symbol = resolve_wsname(s, args.pair, cache_path=ASSETPAIRS_CACHE_PATH)
+        print(f"[i] Live capture: {ws_symbol} for {args.last}", file=sys.stderr)
+        count = asyncio.run(capture_live_ws(ws_symbol, pair_alt, args.out,
+                                            duration, level=args.gzip_level))
+        print(f"[i] Wrote {count} trades to {args.out}", file=sys.stderr)
+        return
+
     # --- determine capture window ---
     if args.last:
             # require --pair and --out
-        if not args.pair or not args.out:
-            ap.error("capture mode with --last requires: --pair and --out")
+        if not args.pair or not (args.out or args.parquet or args.sec_bars):
+            ap.error("capture mode with --last requires --pair and an output "
+                     "(--out, --parquet or --sec-bars)")
         try:
             lookback = parse_duration_to_seconds(args.last)
         except ValueError as e:
@@ -597,8 +1655,9 @@ def main():
         print(f"[i] Window: last {args.last}  →  {siso} to {eiso} UTC", file=sys.stderr)
     else:
         # fallback to calendar day in a timezone (your existing tz_day_bounds)
-        if not args.date or not args.pair or not args.out:
-            ap.error("capture mode requires --pair --out and either --last or --date (optionally --tz)")
+        if not args.date or not args.pair or not (args.out or args.parquet or args.sec_bars):
+            ap.error("capture mode requires --pair, an output (--out, --parquet "
+                     "or --sec-bars) and either --last or --date (optionally --tz)")
         start_ts, end_ts = tz_day_bounds(args.date, args.tz)
         from datetime import datetime, timezone
         siso = datetime.fromtimestamp(start_ts, tz=timezone.utc).isoformat()
@@ -606,19 +1665,50 @@ def main():
         print(f"[i] Window: {args.date} in {args.tz}  →  {siso} to {eiso} UTC", file=sys.stderr)
 
 
-    with requests.Session() as s:
-        pair_alt = resolve_pair(s, args.pair)
-        print(f"[i] Resolved pair: {args.pair} -> {pair_alt}", file=sys.stderr)
+    needs_df = bool(args.parquet or args.sec_bars)
 
-        trade_stream = fetch_trades_for_day(s, pair_alt, start_ts, end_ts, rate_delay=args.rate_delay)
-        count = write_jsonl_gz(trade_stream, args.out)
-        print(f"[i] Wrote {count} trades to {args.out}", file=sys.stderr)
+    with make_session() as s:
+        pair_alt = resolve_pair(s, args.pair, cache_path=ASSETPAIRS_CACHE_PATH,
+                                refresh=args.refresh_pairs)
+        print(f"[i] Resolved pair: {args.pair} -> {pair_alt}", file=sys.stderr)
 
-    if args.parquet or args.sec_bars:
+        use_soa = np is not None and (needs_df or (args.out or "").endswith(".parquet"))
+        if not args.out and not use_soa:
+            ap.error("--parquet/--sec-bars without --out requires numpy")
+        if use_soa:
+            if args.out and args.out.endswith(".parquet") and not needs_df:
+                # No DataFrame consumer: stream row groups to disk as pages
+                # arrive instead of holding the whole day in memory.
+                count = capture_day_parquet(s, pair_alt, start_ts, end_ts,
+                                            args.out, rate_delay=args.rate_delay)
+                print(f"[i] Wrote {count} trades to {args.out}", file=sys.stderr)
+                return
+            # One columnar fetch feeds every requested output -- no writing a
+            # compressed intermediate only to decompress and re-parse it; the
+            # JSONL file itself is skipped entirely when --out is omitted.
+            cols = fetch_trades_for_day_soa(s, pair_alt, start_ts, end_ts,
+                                            rate_delay=args.rate_delay)
+            if args.out:
+                if args.out.endswith(".parquet"):
+                    count = write_parquet_soa(cols, args.out)
+                else:
+                    count = write_jsonl_gz(iter_soa_trades(cols), args.out,
+                                           level=args.gzip_level)
+                print(f"[i] Wrote {count} trades to {args.out}", file=sys.stderr)
+        else:
+            trade_stream = fetch_trades_for_day(s, pair_alt, start_ts, end_ts,
+                                                rate_delay=args.rate_delay)
+            if args.out.endswith(".parquet"):
+                count = write_day(trade_stream, args.out)
+            else:
+                count = write_jsonl_gz(trade_stream, args.out, level=args.gzip_level)
+            print(f"[i] Wrote {count} trades to {args.out}", file=sys.stderr)
+
+    if needs_df:
         if pd is None:
             print("[!] pandas not installed; skipping Parquet/second-bars.", file=sys.stderr)
             return
-        df = load_jsonl_gz_to_df(args.out)
+        df = df_from_soa(cols) if use_soa else load_day_to_df(args.out)
         if args.parquet:
             save_parquet(df, args.parquet)
             print(f"[i] Wrote raw trades Parquet -> {args.parquet}", file=sys.stderr)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Static Kraken pair-alias table.
+
+Answers resolve_pair() for commonly traded symbols without fetching the
+~800-entry AssetPairs catalog. Keys are normalized user input (slashes
+stripped, uppercased); values are Kraken altnames accepted by the public
+endpoints. Symbols not listed here fall back to the live catalog fetch,
+and --refresh-pairs bypasses the table entirely.
+
+Kraken lists Bitcoin as XBT and Dogecoin as XDG; everything else below
+is an identity mapping kept so the happy path stays offline.
+"""
+
+KRAKEN_PAIR_ALIASES = {
+    # Bitcoin (XBT on Kraken)
+    "BTCUSD": "XBTUSD",
+    "BTCEUR": "XBTEUR",
+    "BTCGBP": "XBTGBP",
+    "BTCUSDT": "XBTUSDT",
+    "XBTUSD": "XBTUSD",
+    "XBTEUR": "XBTEUR",
+    # Dogecoin (XDG on Kraken)
+    "DOGEUSD": "XDGUSD",
+    "DOGEEUR": "XDGEUR",
+    "XDGUSD": "XDGUSD",
+    # Majors (altname == conventional symbol)
+    "ETHUSD": "ETHUSD",
+    "ETHEUR": "ETHEUR",
+    "ETHUSDT": "ETHUSDT",
+    "SOLUSD": "SOLUSD",
+    "SOLEUR": "SOLEUR",
+    "ADAUSD": "ADAUSD",
+    "ADAEUR": "ADAEUR",
+    "XRPUSD": "XRPUSD",
+    "XRPEUR": "XRPEUR",
+    "DOTUSD": "DOTUSD",
+    "LTCUSD": "LTCUSD",
+    "LTCEUR": "LTCEUR",
+    "LINKUSD": "LINKUSD",
+    "AVAXUSD": "AVAXUSD",
+    "ATOMUSD": "ATOMUSD",
+    "UNIUSD": "UNIUSD",
+    "XLMUSD": "XLMUSD",
+    "TRXUSD": "TRXUSD",
+    "BCHUSD": "BCHUSD",
+    "ETCUSD": "ETCUSD",
+    "FILUSD": "FILUSD",
+    "NEARUSD": "NEARUSD",
+    "AAVEUSD": "AAVEUSD",
+    "ALGOUSD": "ALGOUSD",
+    "USDTUSD": "USDTUSD",
+    "USDCUSD": "USDCUSD",
+}
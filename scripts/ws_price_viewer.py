@@ -1,15 +1,47 @@
 #!/usr/bin/env python3
 import argparse
 import asyncio
+import functools
 import json
+import re
 import sys
 import threading
-import queue
 import time
 from collections import deque
+
+import numpy as np  # hard dependency of matplotlib, so safe to require here
 from datetime import datetime, timezone, timedelta
 from zoneinfo import ZoneInfo
 
+try:
+    import orjson  # optional, much faster message decode
+except Exception:
+    orjson = None
+
+try:
+    import uvloop  # optional, faster event loop for the reader thread
+except Exception:
+    uvloop = None
+
+try:
+    from tsdownsample import MinMaxLTTBDownsampler  # optional, C downsampler
+except Exception:
+    MinMaxLTTBDownsampler = None
+
+try:
+    import numba
+except Exception:
+    numba = None
+
+try:
+    import msgpack  # optional binary wire format (--wire msgpack)
+except Exception:
+    msgpack = None
+
+# json.loads with orjson when available (accepts str or bytes); bound once at
+# import so the per-frame call carries no availability branch
+_loads = orjson.loads if orjson is not None else json.loads
+
 def _maybe_set_backend(live: bool):
     if not live:
         import matplotlib
@@ -33,7 +65,7 @@ def _parse_args():
     ap.add_argument("--fps", type=float, default=20.0,
                     help="Max redraws per second (live mode)")
     ap.add_argument("--max-points", type=int, default=20000,
-                    help="Cap the number of plotted points (live mode)")
+                    help="Downsample the plot to about this many points (live mode)")
     ap.add_argument("--agg-sec", type=int, default=0,
                     help="Aggregate to N-second buckets (0 = no aggregation)")
     ap.add_argument("--grid", dest="grid", action="store_true", default=True,
@@ -42,52 +74,205 @@ def _parse_args():
     ap.add_argument("--midnight-line", dest="midnight_line", action="store_true", default=True,
                     help="Draw a vertical line at local midnight (default)")
     ap.add_argument("--no-midnight-line", dest="midnight_line", action="store_false")
-    return ap.parse_args()
+    ap.add_argument("--checkpoint-sec", type=int, default=0,
+                    help="Headless: also save the PNG every N seconds while "
+                         "collecting (0 = only at end)")
+    ap.add_argument("--wire", choices=["json", "msgpack"], default="json",
+                    help="Frame encoding used by the server "
+                         "(see kraken_day_capture --wire)")
+    args = ap.parse_args()
+    if args.wire == "msgpack" and msgpack is None:
+        ap.error("--wire msgpack requires msgpack. pip install msgpack")
+    return args
 
 def _iso_to_dt(s: str) -> datetime:
     if s.endswith("Z"):
         s = s[:-1] + "+00:00"
     return datetime.fromisoformat(s)
 
-def _tick_to_dt(ts_float: float) -> datetime:
-    return datetime.fromtimestamp(float(ts_float), tz=timezone.utc)
-
+@functools.lru_cache(maxsize=8)
 def _get_tz(name: str):
     try:
         return ZoneInfo(name)
     except Exception:
         return timezone.utc
 
-async def _ws_reader(url: str, q: queue.Queue, stop_evt: threading.Event):
+def _error_frame(e: Exception) -> bytes:
+    """Error sentinel as bytes so the consumer path stays binary-only."""
+    return json.dumps({"__error__": str(e)}).encode()
+
+def _ws_connect(url: str):
     import websockets
+    # Unbounded library queue (our side applies backpressure), no
+    # permessage-deflate (localhost streams; CPU > bandwidth here), and a
+    # 1 MiB write buffer to cut syscalls on bursty feeds. read_limit is
+    # legacy-client-only — the websockets>=14 asyncio client forwards it to
+    # create_connection, which rejects it — so it stays off.
+    return websockets.connect(
+        url,
+        max_size=None,
+        max_queue=None,
+        compression=None,
+        write_limit=2 ** 20,
+    )
+
+# Live-mode ring capacity. When the plot thread falls behind, the oldest
+# frames are overwritten rather than letting RSS (and GC pressure) grow with
+# an unbounded backlog -- a viewer that downsamples anyway can afford it.
+RING_MAX = 4096
+
+async def _ws_reader(url: str, dq: deque, wake: threading.Event, stop_evt: threading.Event,
+                     symbol=None):
+    dropped = 0
+    want = _symbol_bytes(symbol) if symbol else None
     try:
-        async with websockets.connect(url, max_size=None) as ws:
+        async with _ws_connect(url) as ws:
             async for msg in ws:
                 if stop_evt.is_set():
                     break
-                q.put(msg)
+                # Our servers send binary frames (orjson/msgpack emit bytes),
+                # so this is already bytes and crosses untouched; text frames
+                # from third-party servers get encoded here, off the UI thread
+                if not isinstance(msg, bytes):
+                    msg = msg.encode()
+                # Run the symbol byte-prefilter on the reader's CPU slice so
+                # mismatched frames never cross the ring or wake the plot
+                # thread; _filter_symbol stays the exact check after parse
+                if want is not None and _prefilter_drop(msg, want):
+                    continue
+                if len(dq) == dq.maxlen:  # ring full: append drops the oldest
+                    dropped += 1
+                    if dropped % 10000 == 1:
+                        print(f"[!] viewer behind; dropped {dropped} frames so far",
+                              file=sys.stderr)
+                dq.append(msg)
+                # is_set is a lock-free read; set() only on the empty->busy
+                # transition keeps the Condition out of the steady-state path
+                if not wake.is_set():
+                    wake.set()
     except Exception as e:
-        q.put(json.dumps({"__error__": str(e)}))
+        dq.append(_error_frame(e))
+        wake.set()
 
-def _start_reader_thread(url: str, q: queue.Queue, stop_evt: threading.Event) -> threading.Thread:
+def _run_async(coro):
+    """asyncio.run on uvloop when it's installed, stdlib loop otherwise."""
+    if uvloop is not None:
+        uvloop.install()
+    asyncio.run(coro)
+
+def _start_reader_thread(url: str, dq: deque, wake: threading.Event,
+                         stop_evt: threading.Event, symbol=None) -> threading.Thread:
     def runner():
         try:
-            asyncio.run(_ws_reader(url, q, stop_evt))
+            _run_async(_ws_reader(url, dq, wake, stop_evt, symbol))
         except Exception as e:
-            q.put(json.dumps({"__error__": str(e)}))
+            dq.append(_error_frame(e))
+            wake.set()
     t = threading.Thread(target=runner, daemon=True)
     t.start()
     return t
 
+# Max frames drained per redraw in the live loop; keeps a burst from
+# starving the GUI while still amortizing one draw over many messages.
+DRAIN_MAX = 512
+
+# Partial extractors for the two known wire formats. A secbar/tick frame only
+# needs two of its ~10 fields to plot a point, so pull them straight out of
+# the bytes and skip tokenizing (and building dicts for) everything else.
+# Secbar frames put ts before close (see _iter_secbar_payloads), so one
+# combined scan works; tick producers emit price before time, so the tick
+# fields are searched independently to stay order-agnostic.
+_SECBAR_RE = re.compile(rb'"ts"\s*:\s*"([^"]+)".*?"close"\s*:\s*([-+\d.eE]+)')
+_TICK_TIME_RE = re.compile(rb'"time"\s*:\s*([-+\d.eE]+)')
+_TICK_PRICE_RE = re.compile(rb'"price"\s*:\s*([-+\d.eE]+)')
+
+@functools.lru_cache(maxsize=8)
+def _symbol_bytes(symbol: str) -> bytes:
+    return symbol.replace("/", "").upper().encode()
+
+def _prefilter_drop(raw_b: bytes, want: bytes) -> bool:
+    """memmem prefilter: True when the frame can be dropped before parsing.
+
+    Only frames that name some pair (a pair/symbol key token is present;
+    both wires embed key strings verbatim) but not the wanted one are
+    droppable. Frames without the field fall through so _filter_symbol's
+    accept-when-unlabeled fallback still applies.
+    """
+    if want in raw_b or want in raw_b.replace(b"/", b""):
+        return False
+    return b"pair" in raw_b or b"symbol" in raw_b
+
+@functools.lru_cache(maxsize=8)
+def _symbol_norm(symbol: str) -> str:
+    return symbol.replace("/", "").upper()
+
+def _fields_from_msg(msg: dict, cur_mode: str):
+    """(cur_mode, time, price) from a fully parsed frame, or None to drop."""
+    if cur_mode == "secbar":
+        ts = msg.get("ts"); close = msg.get("close")
+        if ts is None or close is None:
+            return None
+        return cur_mode, ts, close
+    tv = msg.get("time"); p = msg.get("price")
+    if tv is None or p is None:
+        return None
+    return cur_mode, tv, p
+
+def _decode_message(raw_b: bytes, mode: str, symbol, wire: str = "json"):
+    """Extract (cur_mode, time, price) from a raw frame, or None to drop.
+
+    time is an ISO string for secbars and an epoch number for ticks; both
+    fields come back unconverted so callers can batch the parsing. Without
+    a symbol filter the precompiled regexes pull the two fields straight
+    out of the bytes; anything they don't match — and every frame when a
+    symbol filter is active, since that needs the pair field — falls back
+    to a full _loads() parse. msgpack frames always decode whole (already
+    binary, nothing to regex) but are cheap to unpack.
+    """
+    if symbol:
+        # Cheap byte check before paying for a parse; frames that carry no
+        # pair field at all fall through, matching _filter_symbol's
+        # accept-when-unlabeled fallback (see _prefilter_drop)
+        if _prefilter_drop(raw_b, _symbol_bytes(symbol)):
+            return None
+    if wire == "msgpack":
+        try:
+            msg = msgpack.unpackb(raw_b, raw=False)
+        except Exception:
+            return None
+        if symbol and not _filter_symbol(msg, symbol):
+            return None
+        cur = _auto_mode_from_message(msg) if mode == "auto" else mode
+        return _fields_from_msg(msg, cur)
+    if not symbol:
+        if mode in ("secbar", "auto"):
+            m = _SECBAR_RE.search(raw_b)
+            if m:
+                return "secbar", m.group(1).decode(), m.group(2).decode()
+        if mode in ("tick", "auto"):
+            mt = _TICK_TIME_RE.search(raw_b)
+            if mt:
+                mp = _TICK_PRICE_RE.search(raw_b)
+                if mp:
+                    return "tick", mt.group(1).decode(), mp.group(1).decode()
+    try:
+        msg = _loads(raw_b)
+    except Exception:
+        return None
+    if symbol and not _filter_symbol(msg, symbol):
+        return None
+    cur = _auto_mode_from_message(msg) if mode == "auto" else mode
+    return _fields_from_msg(msg, cur)
+
 def _filter_symbol(msg: dict, symbol: str) -> bool:
     if not symbol:
         return True
     pair = msg.get("pair") or msg.get("symbol")
     if not pair:
         return True
-    norm = str(pair).replace("/", "").upper()
-    want = symbol.replace("/", "").upper()
-    return norm == want
+    # the wanted side is one constant per run; only the frame's pair field
+    # actually needs normalizing per call
+    return str(pair).replace("/", "").upper() == _symbol_norm(symbol)
 
 def _auto_mode_from_message(msg: dict, default="secbar"):
     t = msg.get("type")
@@ -99,42 +284,163 @@ def _auto_mode_from_message(msg: dict, default="secbar"):
         return "tick"
     return default
 
-def _append_point(mode: str, msg: dict, tz, agg_sec: int, buf_times, buf_prices):
+_mpl_num0 = None
+
+def _epoch_num0() -> float:
+    """matplotlib date number of the Unix epoch (lazy; needs matplotlib)."""
+    global _mpl_num0
+    if _mpl_num0 is None:
+        from matplotlib.dates import date2num
+        _mpl_num0 = date2num(datetime(1970, 1, 1, tzinfo=timezone.utc))
+    return _mpl_num0
+
+class _PointBuffer:
+    """Preallocated float64 (time, date-number, price) buffers with 2x growth.
+
+    Times are UTC epoch seconds; localization happens once at render time
+    via the tz-aware axis formatter, not per appended point. The x column
+    carries the matplotlib date number, converted when data lands so draws
+    hand ready float64 views to set_data. Appends are scalar stores plus a
+    counter bump — no per-point object allocation.
     """
-    Append a point to buffers (deque) after converting to target tz and applying optional aggregation.
-    Returns True if a visible point was added/updated.
+
+    def __init__(self, capacity: int = 4096):
+        self.t = np.empty(capacity, dtype=np.float64)
+        self.x = np.empty(capacity, dtype=np.float64)
+        self.p = np.empty(capacity, dtype=np.float64)
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        cap = self.t.shape[0] * 2
+        t = np.empty(cap, dtype=np.float64); t[:self.n] = self.t[:self.n]; self.t = t
+        x = np.empty(cap, dtype=np.float64); x[:self.n] = self.x[:self.n]; self.x = x
+        p = np.empty(cap, dtype=np.float64); p[:self.n] = self.p[:self.n]; self.p = p
+
+    def append(self, t: float, p: float):
+        if self.n == self.t.shape[0]:
+            self._grow()
+        self.t[self.n] = t
+        self.x[self.n] = _epoch_num0() + t / 86400.0
+        self.p[self.n] = p
+        self.n += 1
+
+    def extend(self, t_arr, p_arr):
+        n = len(p_arr)
+        while self.n + n > self.t.shape[0]:
+            self._grow()
+        self.t[self.n:self.n + n] = t_arr
+        xs = self.x[self.n:self.n + n]
+        np.multiply(self.t[self.n:self.n + n], 1.0 / 86400.0, out=xs)
+        xs += _epoch_num0()
+        self.p[self.n:self.n + n] = p_arr
+        self.n += n
+
+    def view(self, last: int = 0):
+        """Zero-copy views of the filled region (optionally the last N points)."""
+        lo = self.n - last if last and last < self.n else 0
+        return self.t[lo:self.n], self.p[lo:self.n]
+
+def _iso_batch_to_epoch(iso_list):
+    """Vectorized ISO-8601 -> UTC epoch seconds for a batch of timestamps.
+
+    numpy's datetime64 parser is a C loop but wants naive strings, so strip
+    the UTC suffix our feeds emit; anything it rejects falls back to the
+    per-string fromisoformat path.
     """
-    if mode == "secbar":
-        ts = msg.get("ts"); close = msg.get("close")
-        if ts is None or close is None:
-            return False
-        dt_utc = _iso_to_dt(ts)
-        dt_local = dt_utc.astimezone(tz)
-        price = float(close)
-    else:  # tick
-        t = msg.get("time"); p = msg.get("price")
-        if t is None or p is None:
-            return False
-        dt_utc = _tick_to_dt(float(t))
-        dt_local = dt_utc.astimezone(tz)
-        price = float(p)
+    norm = []
+    for s in iso_list:
+        if s.endswith("+00:00"):
+            s = s[:-6]
+        elif s.endswith("Z"):
+            s = s[:-1]
+        norm.append(s)
+    try:
+        return np.array(norm, dtype="datetime64[ns]").astype(np.int64) / 1e9
+    except Exception:
+        return np.array([_iso_to_dt(s).timestamp() for s in iso_list])
+
+def _downsample_view(t, p, n_out: int):
+    """Reduce (t, p) to ~n_out visually representative points for plotting.
+
+    Uses tsdownsample's MinMaxLTTB when installed; otherwise a strided
+    per-bucket min/max fallback that, unlike every-Nth striding, keeps the
+    spikes a price chart exists to show.
+    """
+    n = len(p)
+    if n <= n_out:
+        return t, p
+    if MinMaxLTTBDownsampler is not None:
+        idx = MinMaxLTTBDownsampler().downsample(t, p, n_out=n_out)
+        return t[idx], p[idx]
+    nb = max(1, n_out // 2)
+    step = n // nb
+    m = nb * step
+    pr = p[:m].reshape(nb, step)
+    base = np.arange(nb, dtype=np.int64) * step
+    idx = np.union1d(base + pr.argmin(axis=1), base + pr.argmax(axis=1))
+    if m < n:
+        idx = np.append(idx, n - 1)
+    return t[idx], p[idx]
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _agg_merge_kernel(t_sec, prices, agg_sec, buf_t, buf_p, n0):
+        """Bucket-floor and merge a batch into the buffer arrays; returns the
+        new fill count. Caller guarantees capacity for n0 + len(prices)."""
+        n = n0
+        for i in range(prices.shape[0]):
+            b = np.floor(t_sec[i] / agg_sec) * agg_sec
+            if n > 0 and buf_t[n - 1] == b:
+                buf_p[n - 1] = prices[i]
+            else:
+                buf_t[n] = b
+                buf_p[n] = prices[i]
+                n += 1
+        return n
 
+def _extend_epoch_batch(t_sec, prices, agg_sec, buf: _PointBuffer):
+    """Append a batch of (epoch-seconds, price) points, honoring --agg-sec."""
     if agg_sec and agg_sec > 0:
-        # floor to bucket
-        bucket_ts = int(dt_local.timestamp() // agg_sec) * agg_sec
-        bucket_dt = datetime.fromtimestamp(bucket_ts, tz=dt_local.tzinfo)
-        # If last point is in same bucket, update the last value to avoid growing the array
-        if buf_times and buf_times[-1] == bucket_dt:
-            buf_prices[-1] = price
-            return True
-        else:
-            buf_times.append(bucket_dt)
-            buf_prices.append(price)
-            return True
+        if numba is not None:
+            t_arr = np.asarray(t_sec, dtype=np.float64)
+            p_arr = np.asarray(prices, dtype=np.float64)
+            while buf.n + p_arr.shape[0] > buf.t.shape[0]:
+                buf._grow()
+            n0 = buf.n
+            buf.n = _agg_merge_kernel(t_arr, p_arr, float(agg_sec),
+                                      buf.t, buf.p, buf.n)
+            # the kernel fills t/p; derive the date-number column for the
+            # newly opened buckets in one vectorized shot
+            xs = buf.x[n0:buf.n]
+            np.multiply(buf.t[n0:buf.n], 1.0 / 86400.0, out=xs)
+            xs += _epoch_num0()
+            return
+        for i in range(len(prices)):
+            t = (t_sec[i] // agg_sec) * agg_sec
+            if buf.n and buf.t[buf.n - 1] == t:
+                buf.p[buf.n - 1] = prices[i]
+            else:
+                buf.append(t, prices[i])
     else:
-        buf_times.append(dt_local)
-        buf_prices.append(price)
-        return True
+        buf.extend(t_sec, prices)
+
+@functools.lru_cache(maxsize=4096)
+def _iso_to_epoch(s: str) -> float:
+    """Scalar ISO-8601 -> epoch seconds, memoized: secbar streams repeat
+    identical second-resolution stamps, so hits skip fromisoformat."""
+    return _iso_to_dt(s).timestamp()
+
+def _append_point(mode: str, tv, pv, buf: _PointBuffer):
+    """Append an extracted (time, price) pair to the buffer, unaggregated.
+
+    Bucketing is no longer done here: the live loop merges drained batches
+    through _extend_epoch_batch and the headless path aggregates once at the
+    end (_aggregate_buffer), both on epoch floats.
+    """
+    buf.append(_iso_to_epoch(tv) if mode == "secbar" else float(tv), float(pv))
 
 def _format_range_label(t0: datetime, t1: datetime) -> str:
     if not t0 or not t1:
@@ -166,14 +472,16 @@ def _compute_midnights_between(left: datetime, right: datetime):
 
 
 
-def _live_plot_loop(args, q: queue.Queue, stop_evt: threading.Event):
+def _live_plot_loop(args, dq: deque, wake: threading.Event, stop_evt: threading.Event):
     import matplotlib.pyplot as plt
     from matplotlib.dates import DateFormatter, AutoDateLocator
 
     tz = _get_tz(args.tz)
+    num0 = _epoch_num0()
 
     plt.ion()
     fig, ax = plt.subplots()
+    canvas = fig.canvas
     ax.set_title(args.title)
     ax.set_xlabel(f"Time ({args.tz})")
     ax.set_ylabel("Price")
@@ -189,18 +497,35 @@ def _live_plot_loop(args, q: queue.Queue, stop_evt: threading.Event):
 
     # Date label
     #date_text = fig.text(0.99, 0.98, "", ha="right", va="top")
-    range_text = fig.text(0.99, 0.95, "", ha="right", va="top")  # NEW: time range
+    # animated=True keeps the range label out of the blit background
+    range_text = fig.text(0.99, 0.95, "", ha="right", va="top", animated=True)
 
 
 
-    # Rolling buffers to keep UI snappy
-    times = deque(maxlen=max(1000, args.max_points))
-    prices = deque(maxlen=max(1000, args.max_points))
-    line, = ax.plot([], [], linewidth=1.0)
+    # Preallocated buffers; the plot is downsampled to ~max_points
+    buf = _PointBuffer()
+    if numba is not None and args.agg_sec:
+        # trigger the JIT compile (or cache load) here, not under the first
+        # batch of live frames
+        _agg_merge_kernel(np.empty(0), np.empty(0), float(args.agg_sec),
+                          buf.t, buf.p, 0)
+    n_out = max(1000, args.max_points)
+    line, = ax.plot([], [], linewidth=1.0, animated=True)
 
     mode = args.mode
     have_labeled_date = False
-    midnight_lines = []
+    midnight_epochs = set()
+    last_day = None
+    last_label_key = None
+
+    # Blit state: cached static background plus the limits it was drawn at
+    bg = None
+    bg_limits = None
+
+    # Running data extents, maintained incrementally so the draw path never
+    # needs relim()'s O(N) walk
+    y_lo = float("inf")
+    y_hi = float("-inf")
 
     # Redraw throttle (FPS)
     min_dt = 1.0 / max(1e-6, args.fps)
@@ -209,70 +534,72 @@ def _live_plot_loop(args, q: queue.Queue, stop_evt: threading.Event):
 
     try:
         while not stop_evt.is_set():
-            try:
-                raw = q.get(timeout=0.05)
-            except queue.Empty:
-                # periodic small refresh helps interactivity
-                if time.monotonic() - last_draw > min_dt:
-                    plt.pause(0.005)
-                    last_draw = time.monotonic()
-                continue
-
-            try:
-                msg = json.loads(raw)
-            except Exception:
-                continue
-
-            if "__error__" in msg:
-                print("[ws] error:", msg["__error__"], file=sys.stderr)
+            # Drain a batch, then do the axis/label/draw work once for all of
+            # it — one relim/draw per DRAIN_MAX messages instead of per frame.
+            appended = 0
+            err = None
+            n_before = buf.n
+            pend_iso = []
+            pend_px = []
+            pend_tick_t = []
+            pend_tick_px = []
+            for _ in range(DRAIN_MAX):
+                try:
+                    raw_b = dq.popleft()
+                except IndexError:
+                    break
+                if b'"__error__"' in raw_b:
+                    err = _loads(raw_b).get("__error__")
+                    break
+                decoded = _decode_message(raw_b, mode, args.symbol, args.wire)
+                if decoded is None:
+                    continue
+                cur_mode, tv, pv = decoded
+                if mode == "auto":
+                    # Streams are homogeneous in practice: latch the detected
+                    # format so later frames skip auto-detection entirely
+                    mode = cur_mode
+                if cur_mode == "secbar":
+                    # Defer ISO parsing so the whole batch goes through one
+                    # vectorized datetime64 conversion
+                    pend_iso.append(tv)
+                    pend_px.append(float(pv))
+                else:
+                    pend_tick_t.append(float(tv))
+                    pend_tick_px.append(float(pv))
+                appended += 1
+            if pend_iso:
+                _extend_epoch_batch(_iso_batch_to_epoch(pend_iso), pend_px,
+                                    args.agg_sec, buf)
+            if pend_tick_t:
+                _extend_epoch_batch(np.asarray(pend_tick_t, dtype=np.float64),
+                                    pend_tick_px, args.agg_sec, buf)
+            if err is not None:
+                print("[ws] error:", err, file=sys.stderr)
                 break
-
-            if not _filter_symbol(msg, args.symbol):
-                continue
-
-            cur_mode = _auto_mode_from_message(msg) if mode == "auto" else mode
-            if not _append_point(cur_mode, msg, tz, args.agg_sec, times, prices):
+            if not appended:
+                wake.clear()
+                if dq:  # producer appended between popleft and clear
+                    continue
+                if not wake.wait(timeout=min_dt):
+                    # idle: service the GUI once per redraw interval instead
+                    # of pumping plt.pause's full event loop at 100 Hz
+                    canvas.flush_events()
                 continue
 
-            # Ensure axis spans exactly the data range
-            if len(times) >= 2:
-                ax.set_xlim(times[0], times[-1])
-
-            # First point: set axis label and initial date text
-            if not have_labeled_date and times:
-                tz_abbr = times[0].tzname() or args.tz
-                ax.set_xlabel(f"Time ({tz_abbr})")
-                #date_text.set_text(times[0].strftime("%Y-%m-%d (%a) %Z"))
-                have_labeled_date = True
-
-            # Update range label continuously
-            if times:
-                range_text.set_text(_format_range_label(times[0], times[-1]))
-
-            # Draw/refresh midnight lines across the visible range
-            if args.midnight_line and len(times) >= 2:
-                needed = _compute_midnights_between(times[0], times[-1])
-                # Build a set of existing x-positions to avoid duplicates
-                existing = set()
-                for ln in midnight_lines:
-                    try:
-                        xdata = ln.get_xdata()
-                        existing.add(xdata[0] if hasattr(xdata, '__iter__') else xdata)
-                    except Exception:
-                        pass
-                # Add any missing midnights
-                for m in needed:
-                    if m not in existing:
-                        midnight_lines.append(ax.axvline(m, linestyle="-", linewidth=1.0, alpha=0.35))
-
-            # Optional extra: move midnight line if the day rolls (unlikely in single-day)
-            # if midnight_line and times[-1].date() != times[0].date():
-            #     new_m = times[-1].replace(hour=0, minute=0, second=0, microsecond=0)
-            #     midnight_line.set_xdata(new_m)
+            # Fold this batch (including a possibly updated last bucket) into
+            # the running y extents
+            seg = buf.p[max(0, n_before - 1):buf.n]
+            if seg.size:
+                lo = float(seg.min()); hi = float(seg.max())
+                if lo < y_lo:
+                    y_lo = lo
+                if hi > y_hi:
+                    y_hi = hi
 
             # Downsample throttle: only attempt redraw every Nth accepted message
-            count_since_draw += 1
-            if args.downsample > 1 and (count_since_draw % args.downsample != 0):
+            count_since_draw += appended
+            if args.downsample > 1 and count_since_draw < args.downsample:
                 continue
 
             # FPS throttle
@@ -280,84 +607,208 @@ def _live_plot_loop(args, q: queue.Queue, stop_evt: threading.Event):
             if now - last_draw < min_dt:
                 continue
             last_draw = now
-
-            # Update visible data (deque → list is cheap, bounded by max_points)
-            line.set_data(list(times), list(prices))
-            ax.relim()
-            ax.autoscale_view()
-            fig.canvas.draw_idle()
-            plt.pause(0.001)
+            count_since_draw = 0
+
+            # Everything from here runs at most fps times per second, not per
+            # batch: endpoint datetime conversions, labels, midnights, limits
+            # and the draw itself. The label renders at second resolution, so
+            # when the integer endpoints haven't moved since the last draw the
+            # whole block — fromtimestamp, strftime and the midnight check —
+            # is skipped, not just the set_text.
+            label_key = (int(buf.t[0]), int(buf.t[buf.n - 1]))
+            if label_key != last_label_key:
+                last_label_key = label_key
+                t0 = datetime.fromtimestamp(buf.t[0], tz)
+                t1 = datetime.fromtimestamp(buf.t[buf.n - 1], tz)
+
+                # First point: set axis label and initial date text
+                if not have_labeled_date:
+                    tz_abbr = t0.tzname() or args.tz
+                    ax.set_xlabel(f"Time ({tz_abbr})")
+                    #date_text.set_text(t0.strftime("%Y-%m-%d (%a) %Z"))
+                    have_labeled_date = True
+                    bg = None  # static content changed; recapture
+
+                range_text.set_text(_format_range_label(t0, t1))
+
+                # Draw/refresh midnight lines, but only when the local date
+                # actually rolls; duplicates are tracked in a set of epoch
+                # seconds instead of re-reading every axvline's xdata
+                if args.midnight_line and buf.n >= 2 and t1.date() != last_day:
+                    last_day = t1.date()
+                    for m in _compute_midnights_between(t0, t1):
+                        key = int(m.timestamp())
+                        if key not in midnight_epochs:
+                            midnight_epochs.add(key)
+                            ax.axvline(num0 + key / 86400.0, linestyle="-",
+                                       linewidth=1.0, alpha=0.35)
+                            bg = None  # static content changed; recapture
+
+            # Downsampling on the date-number column directly: the affine
+            # epoch->num map preserves which points LTTB/min-max select
+            x_plot, p_plot = _downsample_view(buf.x[:buf.n], buf.p[:buf.n], n_out)
+            line.set_data(x_plot, p_plot)
+
+            # Move the limits only when the data escapes them, padding each
+            # move so steady growth stays inside for a while; most frames
+            # then keep their limits and the blit background stays valid
+            x0 = buf.x[0]
+            x1 = buf.x[buf.n - 1]
+            cx = ax.get_xlim()
+            if x0 < cx[0] or x1 > cx[1]:
+                ax.set_xlim(x0, x1 + 0.02 * max(x1 - x0, 1.0 / 86400.0))
+            cy = ax.get_ylim()
+            if y_lo < cy[0] or y_hi > cy[1]:
+                pad = max((y_hi - y_lo) * 0.05, abs(y_hi) * 1e-4, 1e-9)
+                ax.set_ylim(y_lo - pad, y_hi + pad)
+
+            # Blit: repaint only the animated artists over the cached
+            # background; recapture whenever the limits (and thus ticks,
+            # grid and labels) changed
+            limits = ax.get_xlim() + ax.get_ylim()
+            if bg is None or limits != bg_limits:
+                canvas.draw()
+                bg = canvas.copy_from_bbox(fig.bbox)
+                bg_limits = limits
+            canvas.restore_region(bg)
+            ax.draw_artist(line)
+            fig.draw_artist(range_text)
+            canvas.blit(fig.bbox)
+            canvas.flush_events()
     except KeyboardInterrupt:
         pass
     finally:
+        # Animated artists are skipped by full draws; re-enable for savefig/show
+        line.set_animated(False)
+        range_text.set_animated(False)
         if args.out:
             fig.savefig(args.out, dpi=150, bbox_inches="tight")
-            print(f"[i] saved {args.out} ({len(times)} points)")
+            print(f"[i] saved {args.out} ({len(buf)} points)")
         plt.ioff()
         try:
             plt.show()
         except Exception:
             pass
 
-def _headless_collect_and_save(args, q: queue.Queue, stop_evt: threading.Event):
+async def _collect_async(args, buf: _PointBuffer):
+    """Headless collector: frames go straight from the socket into the point
+    buffer on one event loop — no reader thread, no cross-thread handoff."""
+    mode = args.mode
+    async with _ws_connect(args.url) as ws:
+        async for raw in ws:
+            raw_b = raw if isinstance(raw, bytes) else raw.encode()
+            decoded = _decode_message(raw_b, mode, args.symbol, args.wire)
+            if decoded is None:
+                continue
+            cur_mode, tv, pv = decoded
+            if mode == "auto":
+                mode = cur_mode  # latch; streams are homogeneous in practice
+            # Collect raw; --agg-sec is applied in one vectorized pass once
+            # the stream ends (see _aggregate_buffer)
+            _append_point(cur_mode, tv, pv, buf)
+
+def _aggregate_buffer(buf: _PointBuffer, agg_sec: int):
+    """Collapse the buffer to one close per --agg-sec bucket, in place.
+
+    Headless collection appends raw points and aggregates here in a single
+    vectorized pass instead of comparing buckets per message: floor every
+    timestamp to its bucket, then keep the last row of each run of equal
+    buckets — same adjacent-merge semantics as the live path.
+    """
+    if not (agg_sec and agg_sec > 0) or buf.n == 0:
+        return
+    buckets = (buf.t[:buf.n] // agg_sec) * agg_sec
+    keep = np.empty(buf.n, dtype=bool)
+    keep[:-1] = buckets[1:] != buckets[:-1]
+    keep[-1] = True
+    n = int(keep.sum())
+    buf.t[:n] = buckets[keep]
+    buf.p[:n] = buf.p[:buf.n][keep]
+    xs = buf.x[:n]
+    np.multiply(buf.t[:n], 1.0 / 86400.0, out=xs)
+    xs += _epoch_num0()
+    buf.n = n
+
+async def _checkpoint_saver(args, buf: _PointBuffer):
+    """Periodically snapshot the collected series to args.out.
+
+    The figure, axes and line are built once up front; each checkpoint is
+    set_data + relim + savefig on the same Agg canvas, so the recurring cost
+    stays flat instead of re-plotting the figure from scratch every time.
+    """
     import matplotlib.pyplot as plt
     from matplotlib.dates import DateFormatter, AutoDateLocator
 
     tz = _get_tz(args.tz)
-
-    # In headless mode we still allow aggregation for faster/smaller plots
-    times = []
-    prices = []
-    mode = args.mode
-
+    fig, ax = plt.subplots()
+    ax.set_title(args.title)
+    ax.set_xlabel(f"Time ({args.tz})")
+    ax.set_ylabel("Price")
+    ax.xaxis.set_major_locator(AutoDateLocator(tz=tz))
+    ax.xaxis.set_major_formatter(DateFormatter("%H:%M:%S", tz=tz))
+    if args.grid:
+        ax.grid(axis="x", which="major", linestyle="--", alpha=0.2)
+    line, = ax.plot([], [], linewidth=1.0)
     try:
-        while not stop_evt.is_set():
-            try:
-                raw = q.get(timeout=0.25)
-            except queue.Empty:
-                continue
-            try:
-                msg = json.loads(raw)
-            except Exception:
+        while True:
+            await asyncio.sleep(args.checkpoint_sec)
+            if not len(buf):
                 continue
-            if "__error__" in msg:
-                print("[ws] error:", msg["__error__"], file=sys.stderr)
-                break
-            if not _filter_symbol(msg, args.symbol):
-                continue
-            cur_mode = _auto_mode_from_message(msg) if mode == "auto" else mode
+            p_arr = buf.p[:buf.n]
+            line.set_data(buf.x[:buf.n], p_arr)
+            # Explicit limits instead of relim/autoscale: x endpoints are
+            # O(1) reads and one vectorized min/max beats walking the path
+            if buf.n >= 2:
+                ax.set_xlim(buf.x[0], buf.x[buf.n - 1])
+            y_lo = float(p_arr.min()); y_hi = float(p_arr.max())
+            pad = max((y_hi - y_lo) * 0.05, abs(y_hi) * 1e-4, 1e-9)
+            ax.set_ylim(y_lo - pad, y_hi + pad)
+            fig.savefig(args.out, dpi=150)
+    finally:
+        plt.close(fig)
 
-            # Apply same aggregation rule as live
-            if cur_mode == "secbar":
-                dt_utc = _iso_to_dt(msg.get("ts"))
-                dt_local = dt_utc.astimezone(tz)
-                price = float(msg.get("close"))
-            else:
-                dt_utc = _tick_to_dt(float(msg.get("time")))
-                dt_local = dt_utc.astimezone(tz)
-                price = float(msg.get("price"))
-
-            if args.agg_sec and args.agg_sec > 0:
-                bucket_ts = int(dt_local.timestamp() // args.agg_sec) * args.agg_sec
-                bucket_dt = datetime.fromtimestamp(bucket_ts, tz=dt_local.tzinfo)
-                if times and times[-1] == bucket_dt:
-                    prices[-1] = price
-                else:
-                    times.append(bucket_dt)
-                    prices.append(price)
-            else:
-                times.append(dt_local)
-                prices.append(price)
+def _headless_collect_and_save(args):
+    import matplotlib.pyplot as plt
+    from matplotlib.dates import DateFormatter, AutoDateLocator
+
+    tz = _get_tz(args.tz)
+
+    # Headless captures collect raw points (aggregation is deferred), often
+    # for a whole session — start at 64 Ki slots to skip the early regrows
+    buf = _PointBuffer(capacity=65536)
+
+    async def run():
+        ckpt = None
+        if args.checkpoint_sec > 0 and args.out:
+            ckpt = asyncio.create_task(_checkpoint_saver(args, buf))
+        try:
+            await _collect_async(args, buf)
+        finally:
+            if ckpt is not None:
+                ckpt.cancel()
+
+    try:
+        _run_async(run())
     except KeyboardInterrupt:
         pass
+    except Exception as e:
+        print("[ws] error:", e, file=sys.stderr)
 
-    if not times:
+    if not len(buf):
         print("[!] no data collected; nothing to plot")
         return
 
+    _aggregate_buffer(buf, args.agg_sec)
+
+    t_arr, p_arr = buf.view()
+    # Naive datetime64 is interpreted as UTC; the tz-aware formatter localizes
+    x = (t_arr * 1e6).astype("int64").astype("datetime64[us]")
+    t0 = datetime.fromtimestamp(t_arr[0], tz)
+    t1 = datetime.fromtimestamp(t_arr[-1], tz)
+
     fig, ax = plt.subplots()
     ax.set_title(args.title)
-    tz_abbr = times[0].tzname() or args.tz
+    tz_abbr = t0.tzname() or args.tz
     ax.set_xlabel(f"Time ({tz_abbr})")
     ax.set_ylabel("Price")
 
@@ -370,37 +821,42 @@ def _headless_collect_and_save(args, q: queue.Queue, stop_evt: threading.Event):
 
     # Midnight marker
     if args.midnight_line:
-        for m in _compute_midnights_between(times[0], times[-1]):
+        for m in _compute_midnights_between(t0, t1):
             ax.axvline(m, linestyle="-", linewidth=1.0, alpha=0.35)
 
-    ax.set_xlim(times[0], times[-1])
-    ax.plot(times, prices, linewidth=1.0)
+    ax.set_xlim(x[0], x[-1])
+    ax.plot(x, p_arr, linewidth=1.0)
     ax.relim()
     ax.autoscale_view()
 
     # Date label
-    fig.text(0.99, 0.98, times[0].strftime("%Y-%m-%d (%a) %Z"),
+    fig.text(0.99, 0.98, t0.strftime("%Y-%m-%d (%a) %Z"),
              ha="right", va="top")
-    fig.text(0.99, 0.95, _format_range_label(times[0], times[-1]),
+    fig.text(0.99, 0.95, _format_range_label(t0, t1),
          ha="right", va="top")
 
     out = args.out or "price.png"
     fig.savefig(out, dpi=150, bbox_inches="tight")
-    print(f"[i] saved {out} ({len(times)} points)")
+    print(f"[i] saved {out} ({len(buf)} points)")
 
 def main():
     args = _parse_args()
     _maybe_set_backend(args.live)
 
-    q: queue.Queue[str] = queue.Queue(maxsize=10000)
+    if not args.live:
+        # Single-threaded: the collector runs on the main event loop
+        _headless_collect_and_save(args)
+        return
+
+    # Live mode keeps the reader thread: the GUI pump owns the main thread,
+    # and frames cross to it through the lock-free deque
+    dq: deque = deque(maxlen=RING_MAX)
+    wake = threading.Event()
     stop_evt = threading.Event()
-    t = _start_reader_thread(args.url, q, stop_evt)
+    t = _start_reader_thread(args.url, dq, wake, stop_evt, args.symbol)
 
     try:
-        if args.live:
-            _live_plot_loop(args, q, stop_evt)
-        else:
-            _headless_collect_and_save(args, q, stop_evt)
+        _live_plot_loop(args, dq, wake, stop_evt)
     finally:
         stop_evt.set()
         t.join(timeout=1.0)